@@ -0,0 +1,105 @@
+"""
+Auth token latency on a large knox_authtoken table, before and after the
+indexes of migration 0007 (expiry, and (user_id, created)): authenticating a
+request's token, logging in through crm.tokens.issue_token, and one run of
+the expired-token purge. The table is filled with `--tokens` rows spread over
+`--tokens / --tokens-per-user` users; the newest 1% are expired, as they are
+between two hourly purges.
+
+    python -m benchmarks.auth_tokens [--tokens 10000000] [--tokens-per-user 10] [--repeat 200]
+"""
+from . import common
+import argparse
+import time
+
+INDEXES = {
+    'crm_authtoken_expiry_idx': 'CREATE INDEX crm_authtoken_expiry_idx ON knox_authtoken (expiry)',
+    'crm_authtoken_user_created_idx': 'CREATE INDEX crm_authtoken_user_created_idx ON knox_authtoken (user_id, created)',
+}
+EXPIRED_FRACTION = 0.01
+
+
+def fill(cursor, tokens, users):
+    cursor.execute(
+        "INSERT INTO auth_user "
+        "(password, is_superuser, username, first_name, last_name, email, is_staff, is_active, date_joined) "
+        "SELECT '!', false, 'bench' || i, '', '', '', false, true, now() FROM generate_series(1, %s) i "
+        "RETURNING id",
+        [users],
+    )
+    user_ids = sorted(row[0] for row in cursor.fetchall())
+    # Fake digests never match a real token, but share the table and indexes.
+    cursor.execute(
+        "INSERT INTO knox_authtoken (digest, token_key, created, expiry, user_id) "
+        "SELECT repeat(md5(i::text), 4), substr(md5(i::text), 1, 15), "
+        "now() - (%(tokens)s - i) * interval '1 millisecond', "
+        "CASE WHEN i > %(live)s THEN now() - interval '1 minute' ELSE now() + interval '10 hours' END, "
+        "%(first)s + i %% %(users)s "
+        "FROM generate_series(1, %(tokens)s) i",
+        {'tokens': tokens, 'live': int(tokens * (1 - EXPIRED_FRACTION)), 'first': user_ids[0], 'users': users},
+    )
+    return user_ids
+
+
+def run(label, user_ids, repeat):
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from knox.auth import TokenAuthentication
+    from knox.models import AuthToken
+    from crm import purge
+    from crm.tokens import issue_token
+
+    authenticate = TokenAuthentication().authenticate_credentials
+    tokens = [AuthToken.objects.create(User(pk=pk))[1].encode() for pk in user_ids[:repeat]]
+    common.measure(lambda: authenticate(tokens[0]), 20)
+    samples = iter(tokens)
+    common.report(f"{label}: authenticate", common.measure(lambda: authenticate(next(samples)), repeat))
+
+    users = iter(User.objects.filter(pk__in=user_ids[-repeat:]))
+    common.report(f"{label}: login (issue_token)", common.measure(lambda: issue_token(next(users)), repeat))
+
+    # Rolled back so the next run purges the same rows.
+    with transaction.atomic():
+        start = time.perf_counter()
+        deleted = purge.purge_expired_tokens()
+        elapsed = time.perf_counter() - start
+        transaction.set_rollback(True)
+    print(f"{label + ': purge expired':<40} deleted={deleted} time={elapsed:.2f}s")
+
+    del user_ids[:repeat]
+    del user_ids[-repeat:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=10_000_000)
+    parser.add_argument('--tokens-per-user', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    common.setup()
+    from django.db import connection
+
+    with common.test_database():
+        with connection.cursor() as cursor:
+            for name in INDEXES:
+                cursor.execute(f"DROP INDEX IF EXISTS {name}")
+            start = time.perf_counter()
+            user_ids = fill(cursor, args.tokens, args.tokens // args.tokens_per_user)
+            cursor.execute("ANALYZE auth_user, knox_authtoken")
+            print(f"loaded {args.tokens} tokens for {len(user_ids)} users in {time.perf_counter() - start:.0f}s")
+
+        run('before', user_ids, args.repeat)
+
+        with connection.cursor() as cursor:
+            start = time.perf_counter()
+            for sql in INDEXES.values():
+                cursor.execute(sql)
+            cursor.execute("ANALYZE knox_authtoken")
+            print(f"built indexes in {time.perf_counter() - start:.0f}s")
+
+        run('after', user_ids, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
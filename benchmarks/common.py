@@ -0,0 +1,59 @@
+"""
+Shared helpers for the benchmark scripts in this package. Run a benchmark
+from the repository root with the same environment as manage.py, e.g.
+
+    python -m benchmarks.throttling
+
+Benchmarks that need tables create a throwaway test database the same way
+`manage.py test` does and drop it afterwards.
+"""
+from contextlib import contextmanager
+import os
+import statistics
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+
+def setup():
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(verbosity=0):
+    from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+    setup_test_environment()
+    old_config = setup_databases(verbosity, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity)
+        teardown_test_environment()
+
+
+def measure(func, repeat):
+    """
+    Call `func` `repeat` times and return the duration of each call in seconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(label, samples, unit='ms'):
+    scale = {'s': 1, 'ms': 1e3, 'us': 1e6}[unit]
+    print(
+        f"{label:<40} n={len(samples):<6} "
+        f"mean={statistics.fmean(samples) * scale:9.3f}{unit} "
+        f"p50={percentile(samples, 50) * scale:9.3f}{unit} "
+        f"p99={percentile(samples, 99) * scale:9.3f}{unit}"
+    )
@@ -0,0 +1,69 @@
+"""
+Lead list payloads: time to encode LeadSerializer output with DRF's
+JSONRenderer and with crm.renderers.ORJSONRenderer, and the bytes on the wire
+uncompressed, gzipped the way CompressionMiddleware falls back to (Django's
+GZipMiddleware) and brotli-compressed at COMPRESSION_BROTLI_QUALITY.
+
+    python -m benchmarks.compression [--leads 50 500 5000] [--repeat 50]
+"""
+from . import common
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--leads', type=int, nargs='+', default=[50, 500, 5000])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    common.setup()
+    from datetime import timedelta
+    from django.conf import settings
+    from django.middleware.gzip import GZipMiddleware
+    from django.utils import timezone
+    from django.utils.text import compress_string
+    from rest_framework.renderers import JSONRenderer
+    from crm.models import Lead
+    from crm.renderers import ORJSONRenderer
+    from crm.serializers import LeadSerializer
+    import brotli
+
+    statuses = ['New', 'Contacted', 'Qualified', 'Lost']
+    now = timezone.now()
+
+    for count in args.leads:
+        leads = [
+            Lead(
+                id=n, user_id=1, name=f"Lead {n}", email=f"lead{n}@example.com", company=f"Company {n % 97}",
+                status=statuses[n % 4], phone=f"+1555{n:07d}",
+                created_at=now - timedelta(minutes=n), updated_at=now - timedelta(seconds=n),
+            )
+            for n in range(count)
+        ]
+        print(f"\n{count} leads")
+        serialize = common.measure(lambda: LeadSerializer(leads, many=True).data, args.repeat)
+        data = {'message': 'Lead(s) retrieved successfully', 'data': LeadSerializer(leads, many=True).data}
+        common.report('LeadSerializer(many=True).data', serialize)
+
+        drf, fast = JSONRenderer(), ORJSONRenderer()
+        common.report('DRF JSONRenderer', common.measure(lambda: drf.render(data), args.repeat))
+        common.report('ORJSONRenderer', common.measure(lambda: fast.render(data), args.repeat))
+
+        body = fast.render(data)
+        gzipped = compress_string(body, max_random_bytes=GZipMiddleware.max_random_bytes)
+        brotlied = brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        common.report('gzip', common.measure(
+            lambda: compress_string(body, max_random_bytes=GZipMiddleware.max_random_bytes), args.repeat
+        ))
+        common.report(f"brotli q{settings.COMPRESSION_BROTLI_QUALITY}", common.measure(
+            lambda: brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY), args.repeat
+        ))
+        print(
+            f"wire bytes: json={len(body):,} (DRF {len(drf.render(data)):,}) "
+            f"gzip={len(gzipped):,} ({len(gzipped) / len(body):.0%}) "
+            f"br={len(brotlied):,} ({len(brotlied) / len(body):.0%})"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Cost of one reminder sweep over N due reminders: emails sent, SQL queries
+and wall time, for the one-email-per-reminder path and for digest mode
+(CRM_REMINDER_DIGEST_ENABLED).
+
+    python -m benchmarks.reminders [--reminders 10000] [--per-lead 10]
+"""
+from . import common
+import argparse
+import logging
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reminders', type=int, default=10000)
+    parser.add_argument('--per-lead', type=int, default=10, help='due reminders per lead (recipient)')
+    parser.add_argument('--redis-url', default='redis://localhost:6379/15')
+    args = parser.parse_args()
+
+    common.setup()
+    from datetime import timedelta
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core import mail
+    from django.db import connection
+    from django.utils import timezone
+    from crm import redis_client, tasks
+    from crm.models import Lead, Reminder
+
+    settings.REDIS_URL = args.redis_url
+    redis_client._client = None
+    logging.getLogger('crm').setLevel(logging.WARNING)
+
+    queries = 0
+
+    def count_query(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    def seed():
+        Reminder.objects.all().delete()
+        Lead.objects.all().delete()
+        user, _ = User.objects.get_or_create(username='bench')
+        leads = Lead.objects.bulk_create([
+            Lead(user=user, name=f"Lead {n}", email=f"lead{n}@example.com")
+            for n in range(-(-args.reminders // args.per_lead))
+        ])
+        now = timezone.now()
+        Reminder.objects.bulk_create([
+            Reminder(user=user, lead=leads[n // args.per_lead], message=f"Follow up {n}",
+                     remind_at=now - timedelta(seconds=n % 3600))
+            for n in range(args.reminders)
+        ], batch_size=5000)
+
+    with common.test_database():
+        for label, digest in (('per reminder', False), ('digest', True)):
+            seed()
+            settings.CRM_REMINDER_DIGEST_ENABLED = digest
+            mail.outbox = []
+            queries = 0
+            with connection.execute_wrapper(count_query):
+                start = time.perf_counter()
+                tasks.check_pending_reminders()
+                elapsed = time.perf_counter() - start
+
+            pending = Reminder.objects.filter(status='Pending').count()
+            assert pending == 0, f"{pending} reminder(s) left pending"
+            print(
+                f"{label:<13} reminders={args.reminders} emails={len(mail.outbox)} "
+                f"queries={queries} ({queries / args.reminders * 10000:,.0f} per 10k) "
+                f"time={elapsed:.2f}s"
+            )
+
+
+if __name__ == '__main__':
+    main()
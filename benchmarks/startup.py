@@ -0,0 +1,133 @@
+"""
+Boot cost per process type: each one is started in a fresh interpreter
+under `python -X importtime`, the way its real entry point would start it,
+and the import time, module count and peak RSS are reported. The lean worker
+(core.settings_worker) must not import DRF, knox, CORS or django_celery_beat,
+neither at boot nor once it has run a task: `worker-task` also runs one
+reminder sweep, which writes rows and outbox events, on a throwaway test
+database.
+
+    python -m benchmarks.startup [--repeat 5] [--process web worker worker-task beat]
+"""
+from . import common
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+WORKER_BOOT = '''
+from core.celery import app
+import celery.apps.worker
+import django
+django.setup()
+app.loader.import_default_modules()
+'''
+
+# A due recurring reminder swept in a transaction that is rolled back, so the
+# dashboard refreshes it queues never reach the broker.
+SWEEP = '''
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from crm.models import Lead, Reminder
+from crm.tasks import check_pending_reminders
+settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+with transaction.atomic():
+    user = User.objects.create(username='startup')
+    lead = Lead.objects.create(user=user, name='Startup', email='startup@example.com')
+    Reminder.objects.create(user=user, lead=lead, message='Startup', remind_at=timezone.now(), recurrence='FREQ=DAILY')
+    check_pending_reminders.apply()
+    assert Reminder.objects.filter(lead=lead, status='Pending').count() == 1
+    transaction.set_rollback(True)
+'''
+
+PROCESSES = {
+    # gunicorn core.wsgi, plus the URLconf (and with it every view) that the
+    # first request loads.
+    'web': ('core.settings', '''
+from core.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+'''),
+    # celery -A core worker: the Django fixup runs setup and imports every
+    # task module when the worker initializes.
+    'worker': ('core.settings_worker', WORKER_BOOT),
+    'worker-task': ('core.settings_worker', WORKER_BOOT + SWEEP),
+    'beat': ('core.settings', '''
+from core.celery import app
+import celery.apps.beat
+import django
+django.setup()
+app.loader.import_default_modules()
+import django_celery_beat.schedulers
+'''),
+}
+
+REPORT = '''
+import json, resource, sys
+print(json.dumps({
+    'modules': len(sys.modules),
+    'maxrss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'web_only': sorted({name.split('.')[0] for name in sys.modules} & set(%r)),
+}))
+'''
+
+# Packages only the web process (or beat) needs.
+WEB_ONLY = ['rest_framework', 'knox', 'corsheaders', 'django_celery_beat']
+
+# Processes that need the test database.
+NEEDS_DATABASE = {'worker-task'}
+
+IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|')
+
+
+def boot(settings_module, code, db_name=None):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module}
+    if db_name:
+        env['DB_NAME'] = db_name
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code + REPORT % WEB_ONLY],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    # Self times (first column, microseconds) add up to the total import time.
+    import_us = sum(int(match[1]) for match in map(IMPORTTIME.match, result.stderr.splitlines()) if match)
+    return {'import_ms': import_us / 1000, **json.loads(result.stdout.strip().splitlines()[-1])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--process', nargs='+', choices=PROCESSES, default=list(PROCESSES))
+    args = parser.parse_args()
+
+    if not NEEDS_DATABASE & set(args.process):
+        for name in args.process:
+            run_process(name, args.repeat)
+        return
+
+    common.setup()
+    from django.db import connection
+    with common.test_database():
+        for name in args.process:
+            run_process(name, args.repeat, connection.settings_dict['NAME'])
+
+
+def run_process(name, repeat, db_name=None):
+    runs = [boot(*PROCESSES[name], db_name) for _ in range(repeat)]
+    import_ms = statistics.median(run['import_ms'] for run in runs)
+    rss_mb = statistics.median(run['maxrss_kb'] for run in runs) / 1024
+    print(
+        f"{name:<11} settings={PROCESSES[name][0]:<22} import={import_ms:8.1f}ms "
+        f"modules={runs[-1]['modules']:<5} rss={rss_mb:6.1f}MB "
+        f"web-only={','.join(runs[-1]['web_only']) or '-'}"
+    )
+    if PROCESSES[name][0] == 'core.settings_worker' and runs[-1]['web_only']:
+        sys.exit(f"{name} imported web-only packages: {', '.join(runs[-1]['web_only'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Per-request overhead of the Redis token-bucket throttles: a Login request
+checked by LoginIPThrottle and LoginUserThrottle against the same view with
+no throttles, plus the bare cost of one allow_request() round trip.
+
+    python -m benchmarks.throttling [--requests 5000] [--redis-url URL]
+"""
+from . import common
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--redis-url', default='redis://localhost:6379/15')
+    args = parser.parse_args()
+
+    common.setup()
+    from django.conf import settings
+    from rest_framework.response import Response
+    from rest_framework.test import APIRequestFactory
+    from rest_framework.views import APIView
+    from crm import redis_client
+    from crm.throttling import LoginIPThrottle, LoginUserThrottle
+
+    settings.REDIS_URL = args.redis_url
+    redis_client._client = None
+    redis_client.get_redis().ping()
+
+    class Unthrottled(APIView):
+        authentication_classes = ()
+        permission_classes = ()
+        throttle_classes = ()
+
+        def post(self, request):
+            return Response({'message': 'ok'})
+
+    class Throttled(Unthrottled):
+        throttle_classes = (LoginIPThrottle, LoginUserThrottle)
+
+    # Enough refill that every request is allowed and the full script runs.
+    for throttle in (LoginIPThrottle, LoginUserThrottle):
+        throttle.rate = '1000000/s'
+
+    factory = APIRequestFactory()
+    counter = iter(range(10 ** 9))
+
+    def request():
+        n = next(counter)
+        return factory.post(
+            '/api/login/', {'username': f"user{n}", 'password': 'x'}, format='json',
+            REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR=f"198.51.{n // 256 % 256}.{n % 256}",
+        )
+
+    unthrottled, throttled = Unthrottled.as_view(), Throttled.as_view()
+    for view in (unthrottled, throttled):
+        common.measure(lambda: view(request()), 200)
+
+    base = common.measure(lambda: unthrottled(request()), args.requests)
+    full = common.measure(lambda: throttled(request()), args.requests)
+
+    throttle = LoginIPThrottle()
+    check = common.measure(lambda: throttle.allow_request(Throttled().initialize_request(request()), None), args.requests)
+
+    common.report('login view, no throttles', base, 'us')
+    common.report('login view, IP + user token buckets', full, 'us')
+    common.report('LoginIPThrottle.allow_request', check, 'us')
+    overhead = (sum(full) - sum(base)) / len(full)
+    print(f"throttle overhead per request: {overhead * 1e6:.1f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Webhook delivery throughput: queue N outbox events, point an endpoint at a
+local HTTP receiver and run the delivery task until the outbox is empty.
+Reports events/s and the time spent sequencing, POSTing and settling.
+
+    python -m benchmarks.webhooks [--events 100000] [--batch-size 100]
+"""
+from . import common
+import argparse
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=None, help='defaults to WEBHOOK_BATCH_SIZE')
+    args = parser.parse_args()
+
+    common.setup()
+    from django.conf import settings
+    from crm import webhooks
+    from crm.models import OutboxEvent, WebhookEndpoint
+    from crm.tests.receiver import WebhookReceiver
+
+    if args.batch_size:
+        settings.WEBHOOK_BATCH_SIZE = args.batch_size
+
+    timings = {'sequence': 0.0, 'post': 0.0}
+
+    def timed(name, func):
+        def wrapper(*a, **kw):
+            start = time.perf_counter()
+            try:
+                return func(*a, **kw)
+            finally:
+                timings[name] += time.perf_counter() - start
+        return wrapper
+
+    webhooks.sequence_events = timed('sequence', webhooks.sequence_events)
+    webhooks.post_events = timed('post', webhooks.post_events)
+
+    with common.test_database(), WebhookReceiver() as receiver:
+        WebhookEndpoint.objects.create(url=receiver.url, secret='bench')
+        payload = {'id': 0, 'name': 'Lead', 'email': 'lead@example.com', 'status': 'New', 'company': 'Acme'}
+        for start in range(0, args.events, 10000):
+            OutboxEvent.objects.bulk_create([
+                OutboxEvent(event='lead.updated', lead_id=n, object_id=n, payload={**payload, 'id': n})
+                for n in range(start, min(args.events, start + 10000))
+            ])
+
+        runs = 0
+        start = time.perf_counter()
+        while OutboxEvent.objects.exists():
+            webhooks.deliver_pending()
+            runs += 1
+        elapsed = time.perf_counter() - start
+
+        assert len(receiver.events) == args.events
+        print(f"events:        {args.events} in {len(receiver.requests)} POSTs over {runs} task run(s)")
+        print(f"batch size:    {settings.WEBHOOK_BATCH_SIZE}")
+        print(f"total:         {elapsed:.2f}s ({args.events / elapsed:,.0f} events/s)")
+        print(f"sequencing:    {timings['sequence']:.2f}s")
+        print(f"POSTs:         {timings['post']:.2f}s")
+        print(f"claim/settle/prune: {elapsed - timings['sequence'] - timings['post']:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
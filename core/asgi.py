@@ -3,6 +3,10 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The event stream at /api/events/ is an async view holding long-lived
+connections, so it is served from here by uvicorn (deploy/minicrm-asgi.service,
+routed by deploy/nginx/minicrm-events.conf) rather than through gunicorn.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
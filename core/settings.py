@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 import os
 
+from kombu import Queue
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -31,6 +34,10 @@ ALLOWED_HOSTS = ["*"]
 
 # Application definition
 
+LOCAL_APPS = [
+    'crm',
+]
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -47,23 +54,29 @@ INSTALLED_APPS = [
     'django_celery_beat',
 
     # Local apps
-    'crm',
+    *LOCAL_APPS,
 
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'crm.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'crm.profiling.ProfilingMiddleware',  # needs request.user
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Response compression (crm.middleware.CompressionMiddleware)
+COMPRESSION_MIN_SIZE = 1024  # bytes
+COMPRESSION_BROTLI_QUALITY = 4
+
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:5173',
     'http://127.0.0.1:5173',
@@ -95,6 +108,8 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
+    'x-profile',
 ]
 
 REST_FRAMEWORK = {
@@ -103,8 +118,39 @@ REST_FRAMEWORK = {
         'knox.auth.TokenAuthentication',
         
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'crm.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'crm.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Proxies in front of Django (nginx). Client IPs for the per-IP throttles
+    # are read from the X-Forwarded-For entry this many hops from the right,
+    # so nginx must append with $proxy_add_x_forwarded_for. Set to 0 when
+    # Django is reached directly.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
+    # Token-bucket policies (burst/refill period) used by crm.throttling
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.getenv('THROTTLE_LOGIN_IP', '20/min'),
+        'login_user': os.getenv('THROTTLE_LOGIN_USER', '5/min'),
+        'register_ip': os.getenv('THROTTLE_REGISTER_IP', '5/hour'),
+        'crm_write': os.getenv('THROTTLE_CRM_WRITE', '120/min'),
+    },
 }
 
+REST_KNOX = {
+    'TOKEN_TTL': timedelta(hours=10),
+    # Oldest tokens are evicted on login beyond this many per user (crm.tokens)
+    'TOKEN_LIMIT_PER_USER': int(os.getenv('KNOX_TOKEN_LIMIT_PER_USER', 10)),
+}
+
+
+# Redis used directly by the API (idempotency keys, rate limiting, event streams)
+REDIS_URL = os.getenv('REDIS_URL', default='redis://localhost:6379/1')
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 0.5))
 
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
@@ -112,15 +158,120 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
+# Queues: time-critical reminder delivery never shares workers with webhook
+# delivery, bulk purges or housekeeping, and every crm task is routed so
+# nothing lands on the reminders worker by default. The webhooks queue also
+# carries the dashboard recomputes queued by API writes (crm.streams). A
+# worker started without -Q consumes all of them.
+CELERY_TASK_QUEUES = (
+    Queue('default'),
+    Queue('reminders'),
+    Queue('webhooks'),
+    Queue('bulk'),
+    Queue('maintenance'),
+)
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ROUTES = {
+    'crm.tasks.check_pending_reminders': {'queue': 'reminders'},
+    'crm.tasks.deliver_outbox_events': {'queue': 'webhooks'},
+    'crm.tasks.publish_dashboard': {'queue': 'webhooks'},
+    'crm.tasks.purge_leads': {'queue': 'bulk'},
+    'crm.tasks.purge_account': {'queue': 'bulk'},
+    'crm.tasks.purge_records': {'queue': 'bulk'},
+    'crm.tasks.archive_stale_records': {'queue': 'maintenance'},
+    'crm.tasks.purge_expired_tokens': {'queue': 'maintenance'},
+}
+# Reserve one task at a time so a long bulk job can't sit on reminders it
+# has prefetched.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_RESULT_EXPIRES = 60 * 60
+
+# Worker profiles (one supervisor program each):
+#   reminders:   celery -A core worker -Q reminders -c 4 -n reminders@%h
+#   webhooks:    celery -A core worker -Q webhooks -c 2 -n webhooks@%h
+#   bulk:        celery -A core worker -Q bulk -c 2 -O fair -n bulk@%h
+#   maintenance: celery -A core worker -Q maintenance,default -c 1 -O fair -n maintenance@%h
+# with DJANGO_SETTINGS_MODULE=core.settings_worker for a lean boot.
+
 
 # Celery Beat settings
 CELERY_BEAT_SCHEDULE = {
     'check-pending-reminders': {
         'task': 'crm.tasks.check_pending_reminders',
         'schedule': 60.0,  # Check every minute
+        'options': {'expires': 55},  # Drop a sweep the next one has overtaken
+    },
+    'deliver-outbox-events': {
+        'task': 'crm.tasks.deliver_outbox_events',
+        'schedule': 5.0,
+        'options': {'expires': 5},
+    },
+    'archive-stale-records': {
+        'task': 'crm.tasks.archive_stale_records',
+        'schedule': 60.0 * 60,  # Hourly
+        'options': {'expires': 60 * 60},
+    },
+    'purge-expired-tokens': {
+        'task': 'crm.tasks.purge_expired_tokens',
+        'schedule': 60.0 * 60,  # Hourly
+        'options': {'expires': 60 * 60},
     },
 }
 
+# CRM settings
+# Rows deleted per statement by the lead/account purge path.
+CRM_PURGE_BATCH_SIZE = int(os.getenv('CRM_PURGE_BATCH_SIZE', 1000))
+# Most lead ids accepted by one bulk-delete request.
+CRM_BULK_DELETE_MAX_IDS = int(os.getenv('CRM_BULK_DELETE_MAX_IDS', 10000))
+# How long the status of a queued bulk delete can be polled (seconds); covers
+# time spent queued as well as CELERY_RESULT_EXPIRES after it finishes.
+CRM_PURGE_STATUS_TTL = int(os.getenv('CRM_PURGE_STATUS_TTL', 24 * 60 * 60))
+
+# How long a stored Idempotency-Key response is replayed, and how long a
+# concurrent retry waits for the first request with the same key.
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT_MS = 5000
+
+# Send one combined email per recipient instead of one per reminder. Reminders
+# due within the window are pulled into a digest that is already going out.
+CRM_REMINDER_DIGEST_ENABLED = os.getenv('CRM_REMINDER_DIGEST_ENABLED', 'False') == 'True'
+CRM_REMINDER_DIGEST_WINDOW = int(os.getenv('CRM_REMINDER_DIGEST_WINDOW', 15 * 60))  # seconds
+
+# Recurring reminders store only their next occurrence; the occurrences
+# endpoint expands the rest on the fly, within these bounds.
+CRM_REMINDER_OCCURRENCE_LIMIT = int(os.getenv('CRM_REMINDER_OCCURRENCE_LIMIT', 500))
+CRM_REMINDER_OCCURRENCE_MAX_DAYS = int(os.getenv('CRM_REMINDER_OCCURRENCE_MAX_DAYS', 366))
+
+# On-demand profiling (crm.profiling). Staff can profile a single request by
+# sending the header; the sample rates profile a fraction of all requests and
+# Celery task runs. Profiles are kept in a Redis ring buffer.
+CRM_PROFILING_ENABLED = os.getenv('CRM_PROFILING_ENABLED', 'False') == 'True'
+CRM_PROFILING_HEADER = 'X-Profile'
+CRM_PROFILING_SAMPLE_RATE = float(os.getenv('CRM_PROFILING_SAMPLE_RATE', 0))
+CRM_PROFILING_TASK_SAMPLE_RATE = float(os.getenv('CRM_PROFILING_TASK_SAMPLE_RATE', 0))
+CRM_PROFILING_BUFFER_SIZE = 50
+
+# Latest children of each type embedded by the lead bundle / ?expand=
+CRM_LEAD_BUNDLE_CHILD_LIMIT = 20
+
+# Archival of completed reminders and old notes
+CRM_ARCHIVE_REMINDERS_AFTER_DAYS = int(os.getenv('CRM_ARCHIVE_REMINDERS_AFTER_DAYS', 30))
+CRM_ARCHIVE_NOTES_AFTER_DAYS = int(os.getenv('CRM_ARCHIVE_NOTES_AFTER_DAYS', 365))
+CRM_ARCHIVE_BATCH_SIZE = 1000
+
+# Outbox webhook delivery
+WEBHOOK_BATCH_SIZE = 100  # events per POST
+WEBHOOK_MAX_BATCHES_PER_RUN = 20
+WEBHOOK_TIMEOUT = 10
+WEBHOOK_LEASE_TIMEOUT = 60  # seconds a worker may hold an endpoint per batch
+WEBHOOK_RETRY_BASE_DELAY = 10  # seconds, doubled per consecutive failure
+WEBHOOK_RETRY_MAX_DELAY = 60 * 60
+WEBHOOK_SEQUENCE_BATCH_SIZE = 10000  # events given a delivery seq per run
+
+# Server-Sent Events stream (/api/events/)
+EVENT_STREAM_HEARTBEAT = 15  # seconds between keepalive comments
+EVENT_STREAM_QUEUE_SIZE = 100  # buffered events per connection
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
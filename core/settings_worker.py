@@ -0,0 +1,35 @@
+"""
+Lean Django settings for task-only Celery worker processes.
+
+Workers don't serve HTTP, so sessions, messages, static files, CORS, DRF,
+django_celery_beat and admin autodiscovery are left out, and Celery's startup
+system checks (which import the URLconf and with it every view) are skipped.
+Beat still runs with the full core.settings.
+
+    DJANGO_SETTINGS_MODULE=core.settings_worker celery -A core worker
+
+To compare import time and RSS per process type (and check that DRF stays
+out of the worker):
+
+    python -m benchmarks.startup
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+
+os.environ.setdefault('CELERY_SKIP_CHECKS', 'true')
+
+INSTALLED_APPS = [
+    # Admin models only (no admin.py autodiscovery), so the admin log stays
+    # in the cascade when an account is purged. knox is left out because it
+    # imports DRF; its tokens are purged with raw SQL (crm.purge).
+    'django.contrib.admin.apps.SimpleAdminConfig',
+    'django.contrib.contenttypes',
+    'django.contrib.auth',
+
+    # Local apps
+    *LOCAL_APPS,
+]
+
+MIDDLEWARE = []
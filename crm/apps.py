@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CrmConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'crm'
+
+    def ready(self):
+        from . import outbox, profiling, streams
+        outbox.connect()
+        streams.connect()
+        profiling.connect_celery()
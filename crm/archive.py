@@ -0,0 +1,71 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Note, Reminder, ArchivedNote, ArchivedReminder
+from . import streams
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _move_rows(model, archive_model, ids):
+    """
+    Copy rows into the archive table and delete them from the hot table in a
+    single transaction.
+    """
+    qn = connection.ops.quote_name
+    columns = [field.column for field in model._meta.concrete_fields]
+    column_list = ', '.join(qn(column) for column in columns)
+    placeholders = ', '.join(['%s'] * len(ids))
+    hot = qn(model._meta.db_table)
+    cold = qn(archive_model._meta.db_table)
+    pk = qn(model._meta.pk.column)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {cold} ({column_list}, {qn('archived_at')}) "
+            f"SELECT {column_list}, %s FROM {hot} WHERE {pk} IN ({placeholders})",
+            [timezone.now(), *ids],
+        )
+        cursor.execute(f"DELETE FROM {hot} WHERE {pk} IN ({placeholders})", ids)
+        return cursor.rowcount
+
+
+def archive_queryset(queryset, archive_model, batch_size=None):
+    """
+    Move every row matched by `queryset` into `archive_model`, `batch_size`
+    rows per transaction. Returns the number of rows moved.
+    """
+    batch_size = batch_size or settings.CRM_ARCHIVE_BATCH_SIZE
+    moved = 0
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return moved
+        moved += _move_rows(queryset.model, archive_model, ids)
+
+
+def archive_stale_records():
+    """
+    Move completed reminders and old notes past their configured age out of
+    the hot tables.
+    """
+    now = timezone.now()
+    reminders = archive_queryset(
+        Reminder.objects.filter(
+            status='Complete',
+            remind_at__lt=now - timedelta(days=settings.CRM_ARCHIVE_REMINDERS_AFTER_DAYS),
+        ),
+        ArchivedReminder,
+    )
+    stale_notes = Note.objects.filter(
+        created_at__lt=now - timedelta(days=settings.CRM_ARCHIVE_NOTES_AFTER_DAYS),
+    )
+    # Moving notes out can shrink the dashboard's recent notes count.
+    users = set(stale_notes.order_by().values_list('user_id', flat=True).distinct())
+    notes = archive_queryset(stale_notes, ArchivedNote)
+    for user_id in users:
+        streams.refresh_dashboard(user_id)
+    logger.info(f"Archived {reminders} reminder(s) and {notes} note(s)")
+    return {'reminders': reminders, 'notes': notes}
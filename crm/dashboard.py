@@ -0,0 +1,18 @@
+from django.utils import timezone
+from .models import Lead, Contact, Note, Reminder
+
+# Notes counted by the dashboard's recent notes card.
+RECENT_NOTES = 5
+
+
+def dashboard_stats(user_id):
+    """
+    The dashboard counters of one user, as returned by the dashboard API and
+    pushed on the event stream whenever they may have changed.
+    """
+    return {
+        'total_leads': Lead.objects.filter(user_id=user_id).count(),
+        'active_contacts': Contact.objects.filter(user_id=user_id).count(),
+        'pending_reminders': Reminder.objects.filter(user_id=user_id, remind_at__gte=timezone.now()).count(),
+        'recent_notes': Note.objects.filter(user_id=user_id)[:RECENT_NOTES].count(),
+    }
@@ -0,0 +1,189 @@
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+
+DUE_FORMAT = '%B %d, %Y %I:%M %p %Z'
+
+EMAIL_STYLES = """\
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            line-height: 1.6;
+            color: #333;
+            background-color: #f4f4f4;
+            margin: 0;
+            padding: 0;
+        }
+        .container {
+            max-width: 600px;
+            margin: 20px auto;
+            background: #fff;
+            padding: 20px;
+            border-radius: 8px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        }
+        .header {
+            background: #007bff;
+            color: #fff;
+            padding: 10px 20px;
+            text-align: center;
+            border-radius: 8px 8px 0 0;
+        }
+        .header h1 {
+            margin: 0;
+            font-size: 24px;
+        }
+        .content {
+            padding: 20px;
+        }
+        .content h2 {
+            color: #007bff;
+            font-size: 20px;
+        }
+        .content p {
+            margin: 10px 0;
+        }
+        .details {
+            background: #f8f9fa;
+            padding: 15px;
+            border-radius: 5px;
+            margin: 10px 0;
+        }
+        .details p {
+            margin: 5px 0;
+        }
+        .cta {
+            display: inline-block;
+            padding: 10px 20px;
+            background: #007bff;
+            color: #fff;
+            text-decoration: none;
+            border-radius: 5px;
+            margin-top: 15px;
+        }
+        .footer {
+            text-align: center;
+            color: #777;
+            font-size: 12px;
+            padding: 10px;
+            border-top: 1px solid #eee;
+        }
+        .footer a {
+            color: #007bff;
+            text-decoration: none;
+        }
+    </style>"""
+
+
+def _html_page(name, intro, details):
+    return f"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+{EMAIL_STYLES}
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Mini CRM Reminder</h1>
+        </div>
+        <div class="content">
+            <h2>Hello, {name}</h2>
+            <p>{intro}</p>
+{details}
+            <p>Please take a moment to review this task in your Mini CRM account. If you need assistance, our support team is here to help.</p>
+            <a href="https://mini-crm-frontend.vercel.app" class="cta">View Task in Mini CRM</a>
+        </div>
+        <div class="footer">
+            <p>Mini CRM Team | <a href="mailto:support@minicrm.com">support@minicrm.com</a></p>
+            <p>© 2025 Mini CRM. All rights reserved.</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+
+def _html_details(reminder):
+    return f"""            <div class="details">
+                <p><strong>Task:</strong> {reminder.message}</p>
+                <p><strong>Lead:</strong> {reminder.lead.name}</p>
+                <p><strong>Due:</strong> {reminder.remind_at.strftime(DUE_FORMAT)}</p>
+            </div>"""
+
+
+def render_reminder_email(reminder):
+    """
+    Subject, plain-text body and HTML body for a single reminder.
+    """
+    subject = f"Mini CRM Reminder: Task for {reminder.lead.name}"
+
+    # Plain-text body (for email clients that don't support HTML)
+    plain_message = f"""
+Dear {reminder.lead.name},
+
+This is a reminder for your task:
+{reminder.message}
+
+Lead: {reminder.lead.name}
+Due: {reminder.remind_at.strftime(DUE_FORMAT)}
+
+Please contact us at support@minicrm.com if you need assistance.
+
+Best regards,
+Mini CRM Team
+"""
+
+    html_message = _html_page(
+        reminder.lead.name,
+        'We’re reaching out to remind you about an important task in Mini CRM.',
+        _html_details(reminder),
+    )
+    return subject, plain_message, html_message
+
+
+def render_digest_email(reminders):
+    """
+    One combined email for several reminders going to the same recipient.
+    """
+    name = reminders[0].lead.name
+    subject = f"Mini CRM Reminder: {len(reminders)} tasks due"
+
+    tasks = "\n".join(
+        f"- {reminder.message} (Lead: {reminder.lead.name}, Due: {reminder.remind_at.strftime(DUE_FORMAT)})"
+        for reminder in reminders
+    )
+    plain_message = f"""
+Dear {name},
+
+This is a reminder for your tasks:
+{tasks}
+
+Please contact us at support@minicrm.com if you need assistance.
+
+Best regards,
+Mini CRM Team
+"""
+
+    html_message = _html_page(
+        name,
+        f'We’re reaching out to remind you about {len(reminders)} tasks in Mini CRM.',
+        "\n".join(_html_details(reminder) for reminder in reminders),
+    )
+    return subject, plain_message, html_message
+
+
+def send_email(to, rendered, connection=None):
+    subject, plain_message, html_message = rendered
+    # Use EmailMultiAlternatives for plain text and HTML
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=plain_message,
+        from_email=settings.EMAIL_HOST_USER,
+        to=[to],
+        connection=connection,
+    )
+    # Attach HTML version
+    email.attach_alternative(html_message, 'text/html')
+    email.send(fail_silently=False)
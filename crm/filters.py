@@ -0,0 +1,143 @@
+from datetime import datetime
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .models import Lead, Contact, Note, Reminder
+
+RANGE_LOOKUPS = ('gt', 'gte', 'lt', 'lte')
+
+
+class IndexedFilter:
+    """
+    Declarative query-parameter filtering and ordering for list endpoints.
+
+    Subclasses name the fields clients may filter on exactly, filter on by
+    range (`<field>__gte=...`) and order by (`ordering=-<field>`). A request
+    is only accepted if one of the model's `Meta.indexes` that starts with
+    `user` can serve it: the exact-match fields must be a prefix of the index
+    and the range/ordering field, if any, must be the column right after it.
+    Anything else would sort or scan the user's whole table, so is_valid()
+    rejects it and the view answers with a 400.
+    """
+    model = None
+    exact_fields = ()
+    range_fields = ()
+    ordering_fields = ()
+
+    def __init__(self, params):
+        self.params = params
+        self.errors = {}
+        self._parsed = None
+
+    @property
+    def ordering(self):
+        return self.params.get('ordering') or None
+
+    @classmethod
+    def index_paths(cls):
+        return [
+            tuple(index.fields[1:])
+            for index in cls.model._meta.indexes
+            if index.fields[0] == 'user'
+        ]
+
+    @classmethod
+    def is_indexed(cls, exact, sort_field=None):
+        if not exact and sort_field is None:
+            return True
+        depth = len(exact)
+        for path in cls.index_paths():
+            if set(path[:depth]) != exact or len(path) < depth:
+                continue
+            if sort_field is None or (len(path) > depth and path[depth] == sort_field):
+                return True
+        return False
+
+    def _to_python(self, name, value):
+        field = self.model._meta.get_field(name)
+        if field.is_relation:
+            field = field.target_field
+        try:
+            value = field.to_python(value)
+        except DjangoValidationError as e:
+            raise ValidationError({name: e.messages})
+        if isinstance(value, datetime) and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    def parse(self):
+        lookups = {}
+        exact = set()
+        sort_fields = set()
+
+        for key, value in self.params.items():
+            name, _, lookup = key.partition('__')
+            if not lookup and name in self.exact_fields:
+                exact.add(name)
+            elif lookup in RANGE_LOOKUPS and name in self.range_fields:
+                sort_fields.add(name)
+            else:
+                continue
+            lookups[key] = self._to_python(name, value)
+
+        ordering = self.params.get('ordering')
+        if ordering:
+            if ordering.lstrip('-') not in self.ordering_fields:
+                raise ValidationError({'ordering': [
+                    f"Ordering by '{ordering}' is not supported. Choose from: {', '.join(self.ordering_fields)}."
+                ]})
+            sort_fields.add(ordering.lstrip('-'))
+
+        if len(sort_fields) > 1 or not self.is_indexed(exact, next(iter(sort_fields), None)):
+            raise ValidationError({'filters': [
+                'This combination of filters and ordering is not supported by an index.'
+            ]})
+
+        return lookups, ordering
+
+    def is_valid(self):
+        """
+        Validate the query parameters like a serializer would: returns False
+        and fills `errors` instead of raising.
+        """
+        try:
+            self._parsed = self.parse()
+        except ValidationError as e:
+            self.errors = e.detail
+            return False
+        self.errors = {}
+        return True
+
+    def filter_queryset(self, queryset):
+        lookups, ordering = self._parsed or self.parse()
+        queryset = queryset.filter(**lookups)
+        if ordering:
+            queryset = queryset.order_by(ordering)
+        return queryset
+
+
+class LeadFilter(IndexedFilter):
+    model = Lead
+    exact_fields = ('status', 'company')
+    range_fields = ('created_at',)
+    ordering_fields = ('created_at', 'name')
+
+
+class ContactFilter(IndexedFilter):
+    model = Contact
+    exact_fields = ('lead',)
+    ordering_fields = ('name',)
+
+
+class NoteFilter(IndexedFilter):
+    model = Note
+    exact_fields = ('lead',)
+    range_fields = ('created_at',)
+    ordering_fields = ('created_at',)
+
+
+class ReminderFilter(IndexedFilter):
+    model = Reminder
+    exact_fields = ('status', 'lead')
+    range_fields = ('remind_at',)
+    ordering_fields = ('remind_at',)
@@ -0,0 +1,155 @@
+from functools import wraps
+from hashlib import sha256
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.response import Response
+from .redis_client import get_redis
+import json
+import logging
+import secrets
+import threading
+import time
+import redis
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+
+# The lock holds a random token per request, so only its owner extends or
+# releases it: a request whose lock expired can't delete the lock of the
+# retry that took over.
+EXTEND_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_scripts = {}
+
+
+def _script(source):
+    if source not in _scripts:
+        _scripts[source] = get_redis().register_script(source)
+    return _scripts[source]
+
+
+def idempotent(view_method):
+    """
+    Make a write handler safe to retry. When the request carries an
+    `Idempotency-Key` header, the first response is stored in Redis and
+    replayed for any retry with the same key and payload without running the
+    handler again. Concurrent requests with the same key wait briefly on a
+    lock for the first one to finish; the lock is kept alive for as long as
+    the handler runs. Requests without the header go straight through.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        scope = f"idempotency:{request.user.pk}:{request.method}:{request.path}:{key}"
+        response_key = f"{scope}:response"
+        lock_key = f"{scope}:lock"
+        fingerprint = sha256(request.body).hexdigest()
+        token = secrets.token_hex(16)
+
+        try:
+            client = get_redis()
+            stored = client.get(response_key)
+            if stored is None:
+                if not client.set(lock_key, token, nx=True, px=settings.IDEMPOTENCY_LOCK_TIMEOUT_MS):
+                    stored = _wait_for_response(client, response_key)
+                    if stored is None:
+                        return Response({
+                            'message': 'A request with this Idempotency-Key is already in progress'
+                        }, status=409)
+        except redis.RedisError as e:
+            logger.warning(f"Idempotency store unavailable, handling request normally: {str(e)}")
+            return view_method(self, request, *args, **kwargs)
+
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        heartbeat = _Heartbeat(lock_key, token)
+        heartbeat.start()
+        try:
+            response = view_method(self, request, *args, **kwargs)
+            try:
+                if response.status_code < 500:
+                    client.set(response_key, json.dumps({
+                        'fingerprint': fingerprint,
+                        'status': response.status_code,
+                        'data': response.data,
+                    }, cls=DjangoJSONEncoder), ex=settings.IDEMPOTENCY_KEY_TTL)
+            except redis.RedisError as e:
+                logger.warning(f"Failed to store idempotent response for key {key}: {str(e)}")
+        finally:
+            heartbeat.stop()
+            _release(lock_key, token)
+        return response
+
+    return wrapper
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Extends a held lock every third of its timeout until stopped, so a slow
+    handler keeps it and a retry waits instead of running the write again.
+    """
+
+    def __init__(self, lock_key, token):
+        super().__init__(daemon=True)
+        self.lock_key = lock_key
+        self.token = token
+        self.stopped = threading.Event()
+
+    def run(self):
+        timeout = settings.IDEMPOTENCY_LOCK_TIMEOUT_MS
+        while not self.stopped.wait(timeout / 3000):
+            try:
+                if not _script(EXTEND_SCRIPT)(keys=[self.lock_key], args=[self.token, timeout]):
+                    logger.warning(f"Lost idempotency lock {self.lock_key}")
+                    return
+            except redis.RedisError as e:
+                logger.warning(f"Failed to extend idempotency lock {self.lock_key}: {str(e)}")
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def _release(lock_key, token):
+    try:
+        _script(RELEASE_SCRIPT)(keys=[lock_key], args=[token])
+    except redis.RedisError:
+        pass
+
+
+def _wait_for_response(client, response_key):
+    deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_TIMEOUT_MS / 1000
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        stored = client.get(response_key)
+        if stored is not None:
+            return stored
+    return None
+
+
+def _replay(stored, fingerprint):
+    stored = json.loads(stored)
+    if stored['fingerprint'] != fingerprint:
+        return Response({
+            'message': 'Idempotency-Key was already used with a different request payload'
+        }, status=422)
+
+    response = Response(stored['data'], status=stored['status'])
+    response['Idempotent-Replayed'] = 'true'
+    return response
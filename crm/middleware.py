@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+import brotli
+
+
+def accepts_encoding(accept_encoding, coding):
+    """
+    Whether an Accept-Encoding header allows `coding`, honouring `;q=0`.
+    """
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        if name.strip().lower() != coding:
+            continue
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Django's GZipMiddleware, with brotli for clients that accept it when the
+    request carries no cookies. Without ambient credentials a cross-site
+    request can only ever see an anonymous response, so there is no secret
+    for a BREACH-style attack to recover. Anything sent with cookies (the
+    admin, session logins) gets Django's gzip with its length randomization.
+    Bodies smaller than COMPRESSION_MIN_SIZE and streaming responses such as
+    the event stream are sent as-is.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if request.COOKIES or not accepts_encoding(accept_encoding, 'br'):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = 'br'
+
+        # The body changed, so a strong ETag no longer matches it.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+
+        return response
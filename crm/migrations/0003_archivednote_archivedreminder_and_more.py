@@ -0,0 +1,67 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes on existing tables are built without blocking writes.
+    atomic = False
+
+    dependencies = [
+        ('crm', '0002_outboxevent_webhookendpoint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNote',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedReminder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('message', models.CharField(max_length=255)),
+                ('status', models.CharField(max_length=100)),
+                ('remind_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+            ],
+        ),
+        AddIndexConcurrently(
+            model_name='note',
+            index=models.Index(fields=['created_at'], name='crm_note_created_37faed_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='reminder',
+            index=models.Index(fields=['status', 'remind_at'], name='crm_reminde_status_75e990_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivednote',
+            name='lead',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='Lead_ArchivedNote', to='crm.lead'),
+        ),
+        migrations.AddField(
+            model_name='archivednote',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='User_ArchivedNote', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='lead',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='Lead_ArchivedReminder', to='crm.lead'),
+        ),
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='User_ArchivedReminder', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
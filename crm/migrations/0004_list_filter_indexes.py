@@ -0,0 +1,82 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:04
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes on existing tables are built without blocking writes.
+    atomic = False
+
+    dependencies = [
+        ('crm', '0003_archivednote_archivedreminder_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='archivednote',
+            index=models.Index(fields=['user', 'created_at'], name='crm_archive_user_id_cb1910_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='archivednote',
+            index=models.Index(fields=['user', 'lead', 'created_at'], name='crm_archive_user_id_3a538e_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='archivedreminder',
+            index=models.Index(fields=['user', 'remind_at'], name='crm_archive_user_id_ba8ee6_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='archivedreminder',
+            index=models.Index(fields=['user', 'status', 'remind_at'], name='crm_archive_user_id_29aa6f_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='archivedreminder',
+            index=models.Index(fields=['user', 'lead', 'remind_at'], name='crm_archive_user_id_292f1a_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='contact',
+            index=models.Index(fields=['user', 'name'], name='crm_contact_user_id_46ddda_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='contact',
+            index=models.Index(fields=['user', 'lead', 'name'], name='crm_contact_user_id_3afab9_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='lead',
+            index=models.Index(fields=['user', 'created_at'], name='crm_lead_user_id_8c8a91_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='lead',
+            index=models.Index(fields=['user', 'status', 'created_at'], name='crm_lead_user_id_7912cb_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='lead',
+            index=models.Index(fields=['user', 'company', 'created_at'], name='crm_lead_user_id_8a5949_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='lead',
+            index=models.Index(fields=['user', 'name'], name='crm_lead_user_id_a4b7c4_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='note',
+            index=models.Index(fields=['user', 'created_at'], name='crm_note_user_id_ce45cb_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='note',
+            index=models.Index(fields=['user', 'lead', 'created_at'], name='crm_note_user_id_ab635e_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='reminder',
+            index=models.Index(fields=['user', 'remind_at'], name='crm_reminde_user_id_d1c29c_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='reminder',
+            index=models.Index(fields=['user', 'status', 'remind_at'], name='crm_reminde_user_id_f86bf3_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='reminder',
+            index=models.Index(fields=['user', 'lead', 'remind_at'], name='crm_reminde_user_id_0318bc_idx'),
+        ),
+    ]
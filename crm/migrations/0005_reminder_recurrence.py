@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0004_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='recurrence',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='recurrence_start',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='recurrence',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='recurrence_start',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
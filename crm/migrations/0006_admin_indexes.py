@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:13
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes on existing tables are built without blocking writes.
+    atomic = False
+
+    dependencies = [
+        ('crm', '0005_reminder_recurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='contact',
+            index=models.Index(fields=['email'], name='crm_contact_email_240305_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='lead',
+            index=models.Index(fields=['created_at'], name='crm_lead_created_d9bbc3_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='lead',
+            index=models.Index(fields=['status', 'created_at'], name='crm_lead_status_18283c_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='lead',
+            index=models.Index(fields=['email'], name='crm_lead_email_57c21b_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='reminder',
+            index=models.Index(fields=['remind_at'], name='crm_reminde_remind__f29a3a_idx'),
+        ),
+    ]
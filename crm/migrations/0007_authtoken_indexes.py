@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    knox's AuthToken table belongs to a third-party app, so its extra indexes
+    are created here: expiry for the batched purge of expired tokens, and
+    (user_id, created) for evicting a user's oldest tokens on login. Built
+    concurrently so logins and authentication keep writing to the table.
+    """
+    atomic = False
+
+    dependencies = [
+        ('crm', '0006_admin_indexes'),
+        ('knox', '0009_extend_authtoken_field'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS crm_authtoken_expiry_idx ON knox_authtoken (expiry)',
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS crm_authtoken_expiry_idx',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS crm_authtoken_user_created_idx ON knox_authtoken (user_id, created)',
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS crm_authtoken_user_created_idx',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0007_authtoken_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookendpoint',
+            name='lease_token',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='webhookendpoint',
+            name='leased_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
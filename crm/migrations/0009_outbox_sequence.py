@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Deliver outbox events by a seq assigned after commit instead of by id.
+    Existing events and cursors keep their id as seq, and the sequence starts
+    above both so nothing already delivered is sent again.
+    """
+
+    dependencies = [
+        ('crm', '0008_webhook_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxevent',
+            name='seq',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.RenameField(
+            model_name='webhookendpoint',
+            old_name='last_event_id',
+            new_name='last_seq',
+        ),
+        migrations.AddIndex(
+            model_name='outboxevent',
+            index=models.Index(condition=models.Q(('seq__isnull', True)), fields=['id'], name='crm_outbox_unsequenced_idx'),
+        ),
+        migrations.RunSQL(
+            sql=[
+                'CREATE SEQUENCE crm_outboxevent_seq',
+                'UPDATE crm_outboxevent SET seq = id',
+                """
+                SELECT setval('crm_outboxevent_seq', GREATEST(
+                    (SELECT COALESCE(MAX(id), 0) FROM crm_outboxevent),
+                    (SELECT COALESCE(MAX(last_seq), 0) FROM crm_webhookendpoint),
+                    1
+                ))
+                """,
+            ],
+            reverse_sql=['DROP SEQUENCE crm_outboxevent_seq'],
+        ),
+    ]
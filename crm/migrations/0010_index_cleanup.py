@@ -0,0 +1,78 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:52
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The single-column user_id indexes Django creates for foreign keys. Every
+# table already has composite indexes leading with user, which serve the same
+# lookups.
+USER_FK_INDEXES = {
+    'archivednote': 'crm_archivednote_user_id_cdc65b54',
+    'archivedreminder': 'crm_archivedreminder_user_id_776aa5fb',
+    'contact': 'crm_contact_user_id_241b5ed9',
+    'lead': 'crm_lead_user_id_ade4127d',
+    'note': 'crm_note_user_id_bb9a91c7',
+    'reminder': 'crm_reminder_user_id_fb46bb30',
+}
+USER_RELATED_NAMES = {
+    'archivednote': 'User_ArchivedNote',
+    'archivedreminder': 'User_ArchivedReminder',
+    'contact': 'User_Contact',
+    'lead': 'Leads_user',
+    'note': 'User_Note',
+    'reminder': 'User_Remainder',
+}
+
+
+def drop_user_fk_index(model_name):
+    """
+    Mark the user foreign key db_index=False and drop its index without
+    Django's AlterField, which would also drop and re-validate the constraint.
+    """
+    index = USER_FK_INDEXES[model_name]
+    return migrations.SeparateDatabaseAndState(
+        state_operations=[
+            migrations.AlterField(
+                model_name=model_name,
+                name='user',
+                field=models.ForeignKey(
+                    blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE,
+                    related_name=USER_RELATED_NAMES[model_name], to=settings.AUTH_USER_MODEL,
+                ),
+            ),
+        ],
+        database_operations=[
+            migrations.RunSQL(
+                sql=f'DROP INDEX CONCURRENTLY IF EXISTS "{index}"',
+                reverse_sql=f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{index}" ON "crm_{model_name}" ("user_id")',
+            ),
+        ],
+    )
+
+
+class Migration(migrations.Migration):
+    """
+    Trim indexes that cost every write without serving a query: the due
+    sweep's (status, remind_at) becomes a partial index over pending
+    reminders only, and the redundant user_id foreign key indexes go.
+    """
+    atomic = False
+
+    dependencies = [
+        ('crm', '0009_outbox_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='reminder',
+            index=models.Index(condition=models.Q(('status', 'Pending')), fields=['remind_at'], name='crm_reminder_pending_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='reminder',
+            name='crm_reminde_status_75e990_idx',
+        ),
+        *[drop_user_fk_index(model_name) for model_name in USER_FK_INDEXES],
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Record the series slot of each recurring reminder, so moving one earlier
+    no longer brings its slot back as the next occurrence. Pending rows are
+    backfilled with remind_at, the best record of the slot there is.
+    """
+
+    dependencies = [
+        ('crm', '0010_index_cleanup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='occurrence_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='occurrence_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunSQL(
+            sql="UPDATE crm_reminder SET occurrence_at = remind_at WHERE status = 'Pending' AND recurrence <> ''",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
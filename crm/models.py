@@ -2,7 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 
 class Lead(models.Model):
-    user = models.ForeignKey(User, related_name='Leads_user', on_delete=models.CASCADE, null=True, blank=True)
+    user = models.ForeignKey(User, related_name='Leads_user', on_delete=models.CASCADE, null=True, blank=True, db_index=False)
     name = models.CharField(max_length=100)
     email = models.EmailField()
     company = models.CharField(max_length=100, null=True, blank=True)   
@@ -11,32 +11,157 @@ class Lead(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['user', 'status', 'created_at']),
+            models.Index(fields=['user', 'company', 'created_at']),
+            models.Index(fields=['user', 'name']),
+            # Admin changelist ordering, status filter and email search
+            models.Index(fields=['created_at']),
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['email']),
+        ]
+
     def __str__(self):
         return self.name
 
 class Contact(models.Model):
-    user = models.ForeignKey(User, related_name='User_Contact', on_delete=models.CASCADE, null=True, blank=True)
+    user = models.ForeignKey(User, related_name='User_Contact', on_delete=models.CASCADE, null=True, blank=True, db_index=False)
     lead = models.ForeignKey(Lead, related_name='Lead_Contact', on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
     email = models.EmailField()
     phone = models.CharField(max_length=15)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name']),
+            models.Index(fields=['user', 'lead', 'name']),
+            models.Index(fields=['email']),  # Admin email search
+        ]
+
     def __str__(self):
         return self.name
 
 class Note(models.Model):
-    user = models.ForeignKey(User, related_name='User_Note', on_delete=models.CASCADE, null=True, blank=True)
+    user = models.ForeignKey(User, related_name='User_Note', on_delete=models.CASCADE, null=True, blank=True, db_index=False)
     lead = models.ForeignKey(Lead, related_name='Lead_Note', on_delete=models.CASCADE)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['user', 'lead', 'created_at']),
+        ]
+
     def __str__(self):
         return f"Note for {self.lead.name}"
 
 class Reminder(models.Model):
-    user = models.ForeignKey(User, related_name='User_Remainder', on_delete=models.CASCADE, null=True, blank=True)
+    user = models.ForeignKey(User, related_name='User_Remainder', on_delete=models.CASCADE, null=True, blank=True, db_index=False)
     lead = models.ForeignKey(Lead, related_name='Reminder_related_lead', on_delete=models.CASCADE)
     message = models.CharField(max_length=255)
     status = models.CharField(max_length=100, default='Pending')
     remind_at = models.DateTimeField()
+    # RRULE (e.g. FREQ=WEEKLY;COUNT=52) and the series' first occurrence. Only
+    # the next occurrence is stored; see crm.recurrence.
+    recurrence = models.CharField(max_length=255, blank=True, default='')
+    recurrence_start = models.DateTimeField(null=True, blank=True)
+    # The series slot this row stands for; stays put when remind_at is moved.
+    occurrence_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Due-reminder sweep; only pending rows, so it stays small
+            models.Index(fields=['remind_at'], condition=models.Q(status='Pending'), name='crm_reminder_pending_idx'),
+            models.Index(fields=['remind_at']),  # Admin ordering, archive and dashboard sweeps
+            models.Index(fields=['user', 'remind_at']),
+            models.Index(fields=['user', 'status', 'remind_at']),
+            models.Index(fields=['user', 'lead', 'remind_at']),
+        ]
+
+class ArchivedNote(models.Model):
+    """
+    Cold copy of an old Note, moved here by crm.archive. Keeps the original id.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, related_name='User_ArchivedNote', on_delete=models.CASCADE, null=True, blank=True, db_index=False)
+    lead = models.ForeignKey(Lead, related_name='Lead_ArchivedNote', on_delete=models.CASCADE)
+    content = models.TextField()
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['user', 'lead', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Note for {self.lead.name}"
+
+class ArchivedReminder(models.Model):
+    """
+    Cold copy of a completed Reminder, moved here by crm.archive.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, related_name='User_ArchivedReminder', on_delete=models.CASCADE, null=True, blank=True, db_index=False)
+    lead = models.ForeignKey(Lead, related_name='Lead_ArchivedReminder', on_delete=models.CASCADE)
+    message = models.CharField(max_length=255)
+    status = models.CharField(max_length=100)
+    remind_at = models.DateTimeField()
+    recurrence = models.CharField(max_length=255, blank=True, default='')
+    recurrence_start = models.DateTimeField(null=True, blank=True)
+    occurrence_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'remind_at']),
+            models.Index(fields=['user', 'status', 'remind_at']),
+            models.Index(fields=['user', 'lead', 'remind_at']),
+        ]
+
+class OutboxEvent(models.Model):
+    """
+    A CRM change waiting to be pushed to webhook endpoints. Written in the
+    same transaction as the change itself and delivered in `seq` order.
+    """
+    event = models.CharField(max_length=50)
+    lead_id = models.BigIntegerField(null=True, blank=True)
+    object_id = models.BigIntegerField()
+    payload = models.JSONField()
+    # Delivery position, assigned by webhooks.sequence_events once the event
+    # is committed. Unlike the id it never lands behind an already-delivered
+    # event.
+    seq = models.BigIntegerField(null=True, blank=True, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(seq__isnull=True), name='crm_outbox_unsequenced_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event} #{self.object_id}"
+
+class WebhookEndpoint(models.Model):
+    url = models.URLField()
+    secret = models.CharField(max_length=255)
+    is_active = models.BooleanField(default=True)
+    # Delivery cursor: seq of the last OutboxEvent accepted by this endpoint
+    last_seq = models.BigIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    # Delivery lease: the worker holding lease_token may POST the next batch
+    # until leased_until, after which another worker may take over.
+    lease_token = models.UUIDField(null=True, blank=True)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.url
@@ -0,0 +1,99 @@
+from datetime import datetime
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from .models import Lead, Contact, Note, Reminder, OutboxEvent
+
+# Model -> (event prefix, payload fields). Payloads have the shape the API
+# serializers give these objects, but are built without DRF: the worker
+# writes reminders and must not import it.
+TRACKED_MODELS = {
+    Lead: ('lead', ['id', 'name', 'email', 'company', 'status', 'phone', 'created_at', 'updated_at', 'user']),
+    Contact: ('contact', ['id', 'name', 'email', 'phone', 'lead', 'user']),
+    Note: ('note', ['id', 'content', 'created_at', 'lead', 'user']),
+    Reminder: ('reminder', [
+        'id', 'message', 'remind_at', 'recurrence', 'recurrence_start', 'occurrence_at',
+        'created_at', 'status', 'lead', 'user',
+    ]),
+}
+
+
+def _lead_id(instance):
+    return instance.pk if isinstance(instance, Lead) else instance.lead_id
+
+
+def _value(instance, field):
+    if field == 'user':
+        return instance.user_id
+    if field == 'lead':
+        return {'id': instance.lead.id, 'name': instance.lead.name}
+    value = getattr(instance, field)
+    if isinstance(value, datetime):
+        # As DRF renders datetimes: ISO 8601 in the current time zone, with
+        # UTC written as Z.
+        value = timezone.localtime(value).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+    return value
+
+
+def payload(instance):
+    return {field: _value(instance, field) for field in TRACKED_MODELS[type(instance)][1]}
+
+
+def _event(instance, action):
+    return OutboxEvent(
+        event=f"{TRACKED_MODELS[type(instance)][0]}.{action}",
+        lead_id=_lead_id(instance),
+        object_id=instance.pk,
+        payload=payload(instance),
+    )
+
+
+def record_event(instance, action):
+    _event(instance, action).save()
+
+
+def record_events(instances, action):
+    """
+    Outbox entries for rows changed with queryset.update() or other bulk
+    paths that don't send model signals.
+    """
+    OutboxEvent.objects.bulk_create([_event(instance, action) for instance in instances])
+
+
+def record_lead_deletions(lead_ids):
+    """
+    Outbox entries for leads removed by the raw-SQL purge path, which
+    bypasses model signals.
+    """
+    OutboxEvent.objects.bulk_create([
+        OutboxEvent(event='lead.deleted', lead_id=lead_id, object_id=lead_id, payload={'id': lead_id})
+        for lead_id in lead_ids
+    ])
+
+
+def record_deletions(model, rows):
+    """
+    Outbox entries for contacts, notes or reminders removed by raw SQL.
+    `rows` are (id, lead_id) pairs.
+    """
+    prefix = TRACKED_MODELS[model][0]
+    OutboxEvent.objects.bulk_create([
+        OutboxEvent(event=f"{prefix}.deleted", lead_id=lead_id, object_id=pk, payload={'id': pk})
+        for pk, lead_id in rows
+    ])
+
+
+def on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        record_event(instance, 'created' if created else 'updated')
+
+
+def on_delete(sender, instance, **kwargs):
+    record_event(instance, 'deleted')
+
+
+def connect():
+    for model in TRACKED_MODELS:
+        post_save.connect(on_save, sender=model, dispatch_uid=f"outbox_save_{model.__name__}")
+        post_delete.connect(on_delete, sender=model, dispatch_uid=f"outbox_delete_{model.__name__}")
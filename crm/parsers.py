@@ -0,0 +1,18 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from .renderers import ORJSONRenderer
+import orjson
+
+
+class ORJSONParser(BaseParser):
+    """
+    Parses JSON request bodies with orjson.
+    """
+    media_type = 'application/json'
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
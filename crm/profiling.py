@@ -0,0 +1,174 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.utils import timezone
+from .redis_client import get_redis
+import cProfile
+import io
+import json
+import logging
+import pstats
+import random
+import redis
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+PROFILES_KEY = 'crm:profiles'
+MAX_QUERIES = 500
+STATS_LINES = 60
+
+
+class Profile:
+    """
+    cProfile plus a log of every SQL query run on the default connection
+    while the block executes.
+    """
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.queries = []
+        self.profiler = cProfile.Profile()
+
+    def log_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if len(self.queries) < MAX_QUERIES:
+                self.queries.append({'sql': sql, 'duration_ms': (time.perf_counter() - start) * 1000})
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.query_wrapper = connection.execute_wrapper(self.log_query)
+        self.query_wrapper.__enter__()
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.query_wrapper.__exit__(None, None, None)
+        self.duration_ms = (time.perf_counter() - self.started) * 1000
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def save(self, **extra):
+        """
+        Push the profile onto the ring buffer of recent profiles.
+        """
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats('cumulative').print_stats(STATS_LINES)
+        record = {
+            'id': uuid.uuid4().hex,
+            'kind': self.kind,
+            'name': self.name,
+            'created_at': timezone.now(),
+            'duration_ms': self.duration_ms,
+            'query_count': len(self.queries),
+            'query_time_ms': sum(query['duration_ms'] for query in self.queries),
+            **extra,
+            'queries': self.queries,
+            'stats': stream.getvalue(),
+        }
+        try:
+            pipe = get_redis().pipeline()
+            pipe.lpush(PROFILES_KEY, json.dumps(record, cls=DjangoJSONEncoder))
+            pipe.ltrim(PROFILES_KEY, 0, settings.CRM_PROFILING_BUFFER_SIZE - 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Failed to store profile for {self.name}: {str(e)}")
+
+
+def recent_profiles():
+    return [json.loads(record) for record in get_redis().lrange(PROFILES_KEY, 0, -1)]
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request when a staff user sends the CRM_PROFILING_HEADER header,
+    or at random with probability CRM_PROFILING_SAMPLE_RATE. Removed from the
+    stack entirely unless CRM_PROFILING_ENABLED is set. Only requests served
+    through WSGI are profiled; under ASGI cProfile would also see every other
+    coroutine on the loop, so requests pass straight through.
+
+    Must come after AuthenticationMiddleware: the header is only honoured
+    once the caller is known to be staff, by session or by knox token.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.CRM_PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = settings.CRM_PROFILING_HEADER
+        self.sample_rate = settings.CRM_PROFILING_SAMPLE_RATE
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not (sampled or (self.header in request.headers and is_staff(request))):
+            return self.get_response(request)
+
+        with Profile('request', request.path) as profile:
+            response = self.get_response(request)
+        profile.save(method=request.method, status=response.status_code)
+        return response
+
+
+def is_staff(request):
+    """
+    Whether the request comes from a staff user: the session user, or else
+    the user of the knox token DRF would authenticate it with.
+    """
+    # Web-only dependencies, kept out of the worker's import path.
+    from knox.auth import TokenAuthentication
+    from rest_framework.exceptions import AuthenticationFailed
+
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    try:
+        authenticated = TokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return authenticated is not None and authenticated[0].is_staff
+
+
+_task_profiles = {}
+
+
+def _start_task_profile(task_id=None, task=None, **kwargs):
+    if random.random() < settings.CRM_PROFILING_TASK_SAMPLE_RATE:
+        profile = Profile('task', task.name)
+        _task_profiles[task_id] = profile
+        profile.start()
+
+
+def _finish_task_profile(task_id=None, state=None, **kwargs):
+    profile = _task_profiles.pop(task_id, None)
+    if profile is not None:
+        profile.stop()
+        profile.save(status=state)
+
+
+def connect_celery():
+    """
+    Sample Celery task runs. Nothing is connected when the rate is zero.
+    """
+    if settings.CRM_PROFILING_TASK_SAMPLE_RATE > 0:
+        task_prerun.connect(_start_task_profile, weak=False, dispatch_uid='crm_profile_task_start')
+        task_postrun.connect(_finish_task_profile, weak=False, dispatch_uid='crm_profile_task_finish')
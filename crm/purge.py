@@ -0,0 +1,148 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Lead, Contact, Note, Reminder, ArchivedNote, ArchivedReminder
+from .outbox import record_deletions, record_lead_deletions
+from . import streams
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tables that hang off a lead, deleted before the lead rows themselves.
+LEAD_CHILD_MODELS = [Contact, Note, Reminder, ArchivedNote, ArchivedReminder]
+
+# knox's token table, addressed by name so the worker can purge it without
+# installing knox (and with it DRF).
+AUTH_TOKEN_TABLE = 'knox_authtoken'
+AUTH_TOKEN_PK = 'digest'
+
+
+def delete_in_batches(model, where, params, batch_size=None):
+    """
+    Delete rows of `model` matching the raw SQL `where` clause, at most
+    `batch_size` rows per statement. Every statement commits on its own, so no
+    long-running transaction is held and no rows are loaded into Python.
+    Returns the number of rows deleted.
+    """
+    return delete_from_table(model._meta.db_table, model._meta.pk.column, where, params, batch_size)
+
+
+def delete_from_table(table, pk, where, params, batch_size=None):
+    """
+    `delete_in_batches` for a table given by name and primary key column.
+    """
+    batch_size = batch_size or settings.CRM_PURGE_BATCH_SIZE
+    qn = connection.ops.quote_name
+    table = qn(table)
+    pk = qn(pk)
+    sql = (
+        f"DELETE FROM {table} WHERE {pk} IN "
+        f"(SELECT {pk} FROM {table} WHERE {where} LIMIT %s)"
+    )
+
+    total = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*params, batch_size])
+            deleted = cursor.rowcount
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def _in_clause(column, values):
+    column = connection.ops.quote_name(column)
+    return f"{column} IN ({', '.join(['%s'] * len(values))})"
+
+
+def purge_leads(lead_ids, batch_size=None, progress=None):
+    """
+    Delete the given leads together with their contacts, notes and reminders.
+    Leads are processed `batch_size` at a time; `progress(done, total)` is
+    called after every batch.
+    """
+    batch_size = batch_size or settings.CRM_PURGE_BATCH_SIZE
+    lead_ids = list(lead_ids)
+    total = len(lead_ids)
+    deleted = 0
+
+    for start in range(0, total, batch_size):
+        chunk = lead_ids[start:start + batch_size]
+        for model in LEAD_CHILD_MODELS:
+            delete_in_batches(model, _in_clause('lead_id', chunk), chunk, batch_size)
+        with transaction.atomic():
+            deleted += delete_in_batches(Lead, _in_clause('id', chunk), chunk, batch_size)
+            record_lead_deletions(chunk)
+
+        if progress:
+            progress(min(start + batch_size, total), total)
+
+    logger.info(f"Purged {deleted} lead(s)")
+    return deleted
+
+
+def purge_rows(model, ids, batch_size=None):
+    """
+    Delete contacts, notes or reminders by id, `batch_size` rows per
+    transaction.
+    """
+    batch_size = batch_size or settings.CRM_PURGE_BATCH_SIZE
+    ids = list(ids)
+    deleted = 0
+
+    with streams.batched_refresh():
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            rows = list(model.objects.filter(pk__in=chunk).values_list('id', 'lead_id', 'user_id'))
+            with transaction.atomic():
+                deleted += delete_in_batches(model, _in_clause('id', chunk), chunk, batch_size)
+                record_deletions(model, [(pk, lead_id) for pk, lead_id, _ in rows])
+            for _, _, user_id in rows:
+                streams.refresh_dashboard(user_id)
+
+    logger.info(f"Purged {deleted} {model._meta.verbose_name_plural}")
+    return deleted
+
+
+def purge_account(user_id, batch_size=None, progress=None):
+    """
+    Delete a user and everything they own. Leads are fetched and purged one
+    batch of ids at a time, so the size of the book never matters.
+    """
+    batch_size = batch_size or settings.CRM_PURGE_BATCH_SIZE
+    total = Lead.objects.filter(user_id=user_id).count()
+    done = 0
+
+    while True:
+        lead_ids = list(
+            Lead.objects.filter(user_id=user_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not lead_ids:
+            break
+        done += purge_leads(lead_ids, batch_size)
+        if progress:
+            progress(done, total)
+
+    # Rows this user attached to leads they don't own.
+    for model in LEAD_CHILD_MODELS:
+        delete_in_batches(model, _in_clause('user_id', [user_id]), [user_id], batch_size)
+
+    delete_from_table(AUTH_TOKEN_TABLE, AUTH_TOKEN_PK, _in_clause('user_id', [user_id]), [user_id], batch_size)
+    # Only the admin log is left for the ORM cascade.
+    User.objects.filter(pk=user_id).delete()
+    logger.info(f"Purged account {user_id} ({done} lead(s))")
+    return done
+
+
+def purge_expired_tokens(batch_size=None):
+    """
+    Delete every expired auth token in bounded batches. Returns the number
+    deleted.
+    """
+    expiry = connection.ops.quote_name('expiry')
+    deleted = delete_from_table(AUTH_TOKEN_TABLE, AUTH_TOKEN_PK, f"{expiry} < %s", [timezone.now()], batch_size)
+    logger.info(f"Purged {deleted} expired token(s)")
+    return deleted
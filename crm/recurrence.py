@@ -0,0 +1,207 @@
+from dateutil.rrule import rrulestr
+from .models import Reminder
+from . import outbox, streams
+import heapq
+import itertools
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Reminders are swept once a minute, so anything finer than hourly would only
+# pile up missed occurrences.
+UNSUPPORTED_FREQUENCIES = ('MINUTELY', 'SECONDLY')
+# Rule parts a reminder may use. BYMINUTE and BYSECOND would get around the
+# hourly limit; BYYEARDAY, BYWEEKNO and BYEASTER aren't needed and make rules
+# that can never occur hard to spot without iterating them to the year 9999.
+SUPPORTED_PARTS = {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL', 'WKST', 'BYDAY', 'BYMONTHDAY', 'BYMONTH', 'BYHOUR', 'BYSETPOS'}
+# Inclusive bounds of the numeric list parts, per frequency where it matters.
+PART_RANGES = {
+    'BYMONTH': (1, 12),
+    'BYHOUR': (0, 23),
+    'BYMONTHDAY': (-31, 31),
+}
+# BYSETPOS and BYDAY ordinals select within a month or year; on finer
+# frequencies a position that is never reached iterates forever.
+POSITION_RANGES = {'MONTHLY': (-31, 31), 'YEARLY': (-366, 366)}
+ORDINAL_RANGES = {'MONTHLY': (-5, 5), 'YEARLY': (-53, 53)}
+MONTH_DAYS = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+WEEKDAY = re.compile(r'([+-]?\d+)?(MO|TU|WE|TH|FR|SA|SU)')
+
+
+def _numbers(name, value, low, high, zero=False):
+    try:
+        numbers = [int(item) for item in value.split(',')]
+    except ValueError:
+        raise ValueError(f"{name} must be a list of whole numbers.")
+    if any(not low <= number <= high or (number == 0 and not zero) for number in numbers):
+        raise ValueError(f"{name} must be between {low} and {high}.")
+    return numbers
+
+
+def _check_parts(values):
+    freq = values['FREQ']
+    unsupported = sorted(set(values) - SUPPORTED_PARTS)
+    if unsupported:
+        raise ValueError(f"Unsupported rule part(s): {', '.join(unsupported)}.")
+    for name in ('INTERVAL', 'COUNT'):
+        if name in values:
+            _numbers(name, values[name], 1, 10 ** 6)
+    numbers = {
+        name: _numbers(name, values[name], low, high, zero=low == 0)
+        for name, (low, high) in PART_RANGES.items() if name in values
+    }
+
+    if 'BYSETPOS' in values:
+        if freq not in POSITION_RANGES:
+            raise ValueError('BYSETPOS is only supported with FREQ=MONTHLY or FREQ=YEARLY.')
+        _numbers('BYSETPOS', values['BYSETPOS'], *POSITION_RANGES[freq])
+    if 'BYDAY' in values:
+        days = [WEEKDAY.fullmatch(day) for day in values['BYDAY'].split(',')]
+        if not all(days):
+            raise ValueError('BYDAY must list weekdays, e.g. MO,WE or 1FR.')
+        low, high = ORDINAL_RANGES.get(freq, (0, 0))
+        if any(day[1] and not (low <= int(day[1]) <= high and int(day[1])) for day in days):
+            raise ValueError(f"BYDAY positions are not supported with FREQ={freq}." if low == high
+                             else f"BYDAY positions must be between {low} and {high}.")
+    if 'BYMONTHDAY' in numbers:
+        months = numbers.get('BYMONTH', range(1, 13))
+        if not any(abs(day) <= MONTH_DAYS[month - 1] for month in months for day in numbers['BYMONTHDAY']):
+            raise ValueError('BYMONTHDAY never falls in the given months.')
+
+
+def parse_rule(rule, dtstart):
+    """
+    Build a dateutil rrule from a single RRULE line (the `RRULE:` prefix is
+    optional) anchored at `dtstart`. Raises ValueError on a malformed or
+    unsupported rule.
+    """
+    rule = rule.strip()
+    if rule.upper().startswith('RRULE:'):
+        rule = rule[len('RRULE:'):]
+    parts = [part.partition('=') for part in rule.upper().split(';')]
+    if any(not (name and sep and value) for name, sep, value in parts) or '\n' in rule or ':' in rule:
+        raise ValueError('Expected a single RRULE, e.g. FREQ=WEEKLY;COUNT=10.')
+
+    values = dict((name, value) for name, _, value in parts)
+    freq = values.get('FREQ')
+    if freq is None:
+        raise ValueError('FREQ is required.')
+    if freq in UNSUPPORTED_FREQUENCIES:
+        raise ValueError('Recurrence must not be more frequent than hourly.')
+    _check_parts(values)
+    return rrulestr(rule, dtstart=dtstart)
+
+
+def validate_rule(rule, dtstart):
+    """
+    `parse_rule`, plus one evaluation of the rule: some rules only fail once
+    iterated, or never produce an occurrence at all.
+    """
+    parsed = parse_rule(rule, dtstart)
+    try:
+        upcoming = parsed.after(dtstart, inc=True)
+    except Exception:
+        raise ValueError('The rule cannot be evaluated.')
+    if upcoming is None and not ({'COUNT', 'UNTIL'} & {part.split('=')[0] for part in rule.upper().split(';')}):
+        raise ValueError('The rule never occurs.')
+    return parsed
+
+
+def series_rule(reminder):
+    return parse_rule(reminder.recurrence, reminder.recurrence_start or reminder.remind_at)
+
+
+def last_covered(reminder):
+    """
+    The latest point of the series the reminder already accounts for: its
+    own slot, or its `remind_at` if it was moved later than that. A reminder
+    moved earlier still covers its slot.
+    """
+    return max(reminder.remind_at, reminder.occurrence_at or reminder.remind_at)
+
+
+def next_occurrence(reminder):
+    """
+    The first occurrence of the reminder's series after the ones it covers,
+    or None once the series is exhausted.
+    """
+    return series_rule(reminder).after(last_covered(reminder))
+
+
+def schedule_next(reminders):
+    """
+    Materialize the next occurrence of every recurring reminder in
+    `reminders` as a new Pending row. Only ever one future row exists per
+    series; the rest are computed on demand by `occurrences`.
+    """
+    upcoming = []
+    for reminder in reminders:
+        if not reminder.recurrence:
+            continue
+        try:
+            remind_at = next_occurrence(reminder)
+        except Exception as e:
+            # Rules stored before validation was tightened may still fail
+            # here; the series simply ends.
+            logger.error(f"Invalid recurrence on reminder {reminder.id}: {str(e)}")
+            continue
+        if remind_at is None:
+            continue
+        upcoming.append(Reminder(
+            user_id=reminder.user_id,
+            lead_id=reminder.lead_id,
+            message=reminder.message,
+            remind_at=remind_at,
+            recurrence=reminder.recurrence,
+            recurrence_start=reminder.recurrence_start,
+            occurrence_at=remind_at,
+        ))
+
+    if upcoming:
+        # bulk_create skips post_save, so record the outbox events and
+        # dashboard refreshes here.
+        created = Reminder.objects.bulk_create(upcoming)
+        outbox.record_events(created, 'created')
+        for reminder in created:
+            streams.refresh_dashboard(reminder.user_id)
+    return upcoming
+
+
+def _series_occurrences(reminder, start, end):
+    """
+    Lazily yield the not-yet-materialized occurrences of a pending series
+    between `start` and `end`.
+    """
+    covered = last_covered(reminder)
+    after = max(start, covered)
+    inclusive = after != covered
+    try:
+        for remind_at in series_rule(reminder).xafter(after, inc=inclusive):
+            if remind_at > end:
+                return
+            yield (remind_at, reminder, False)
+    except Exception as e:
+        logger.error(f"Invalid recurrence on reminder {reminder.id}: {str(e)}")
+
+
+def occurrences(user, start, end, limit):
+    """
+    Every reminder of `user` falling between `start` and `end`, ordered by
+    time: stored rows as they are, plus the future occurrences of each
+    pending recurring reminder, computed without being stored. At most
+    `limit` items are returned as (remind_at, reminder, materialized) tuples.
+    """
+    stored = (
+        (reminder.remind_at, reminder, True)
+        for reminder in Reminder.objects.filter(
+            user=user, remind_at__gte=start, remind_at__lte=end
+        ).select_related('lead').order_by('remind_at').iterator()
+    )
+    series = Reminder.objects.filter(
+        user=user, status='Pending', remind_at__lte=end
+    ).exclude(recurrence='').select_related('lead')
+    expanded = [_series_occurrences(reminder, start, end) for reminder in series]
+
+    merged = heapq.merge(stored, *expanded, key=lambda occurrence: occurrence[0])
+    return list(itertools.islice(merged, limit))
@@ -0,0 +1,19 @@
+from django.conf import settings
+import redis
+
+_client = None
+
+
+def get_redis():
+    """
+    Return the process-wide Redis client used for request-path state
+    (idempotency keys and the like). Connections are pooled by redis-py.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _client
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Lead, Contact, Note, Reminder
+from .recurrence import validate_rule
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
 
@@ -52,5 +53,57 @@ class ReminderSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Reminder
-        fields = ['id', 'message', 'remind_at', 'created_at', 'status', 'lead', 'lead_id', 'user']
-        read_only_fields = ['user'] 
\ No newline at end of file
+        fields = [
+            'id', 'message', 'remind_at', 'recurrence', 'recurrence_start', 'occurrence_at',
+            'created_at', 'status', 'lead', 'lead_id', 'user',
+        ]
+        read_only_fields = ['user', 'recurrence_start', 'occurrence_at']
+
+    def validate(self, attrs):
+        instance = self.instance
+        recurrence = attrs.get('recurrence', instance.recurrence if instance is not None else '')
+        if not recurrence:
+            attrs['recurrence_start'] = attrs['occurrence_at'] = None
+            return attrs
+
+        # Editing one occurrence keeps the series anchored where it began, and
+        # the occurrence on its slot however far remind_at is moved.
+        if instance is not None and instance.recurrence == recurrence and instance.recurrence_start:
+            start = instance.recurrence_start
+            slot = instance.occurrence_at or instance.remind_at
+        else:
+            start = slot = attrs.get('remind_at', instance.remind_at if instance is not None else None)
+        try:
+            validate_rule(recurrence, start)
+        except ValueError as e:
+            raise serializers.ValidationError({'recurrence': [str(e)]})
+        attrs['recurrence_start'] = start
+        attrs['occurrence_at'] = slot
+        return attrs
+
+class LeadBundleSerializer(LeadSerializer):
+    """
+    A lead with child counts and its latest contacts, notes and reminders.
+    Expects the queryset from `views.lead_bundle_queryset`; children not named
+    in context['expand'] are left out.
+    """
+    EXPANDABLE = ('contacts', 'notes', 'reminders')
+
+    contact_count = serializers.IntegerField(read_only=True)
+    note_count = serializers.IntegerField(read_only=True)
+    reminder_count = serializers.IntegerField(read_only=True)
+    contacts = ContactSerializer(source='latest_contacts', many=True, read_only=True)
+    notes = NoteSerializer(source='latest_notes', many=True, read_only=True)
+    reminders = ReminderSerializer(source='latest_reminders', many=True, read_only=True)
+
+    class Meta(LeadSerializer.Meta):
+        fields = LeadSerializer.Meta.fields + [
+            'contact_count', 'note_count', 'reminder_count', 'contacts', 'notes', 'reminders'
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.context.get('expand', self.EXPANDABLE)
+        for name in self.EXPANDABLE:
+            if name not in expand:
+                self.fields.pop(name)
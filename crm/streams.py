@@ -0,0 +1,229 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from .dashboard import dashboard_stats
+from .models import Lead, Contact, Note, Reminder
+from .redis_client import get_redis
+import asyncio
+import json
+import logging
+import redis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'crm:events:'
+# Set while a dashboard recompute is queued for the user, so a burst of
+# writes queues one. Expires in case the task is lost.
+QUEUED_PREFIX = 'crm:dashboard:queued:'
+QUEUED_TTL = 60
+
+# Models whose writes can change the dashboard counters
+DASHBOARD_MODELS = (Lead, Contact, Note, Reminder)
+
+# User ids collected by an open batched_refresh() block
+_batch = ContextVar('dashboard_batch', default=None)
+
+
+def publish(user_id, event, data):
+    """
+    Push an event to every open stream of `user_id`. The SSE frame is rendered
+    here once so subscribers only forward bytes.
+    """
+    if user_id is None:
+        return
+    frame = f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+    try:
+        get_redis().publish(f"{CHANNEL_PREFIX}{user_id}", frame)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to publish {event} for user {user_id}: {str(e)}")
+
+
+def publish_dashboard(user_id):
+    publish(user_id, 'dashboard.changed', dashboard_stats(user_id))
+
+
+def queue_dashboard(user_id):
+    """
+    Have a worker recompute and publish the dashboard counters of `user_id`
+    (crm.tasks.publish_dashboard), unless a recompute is already queued.
+    """
+    from .tasks import publish_dashboard as task
+
+    try:
+        if not get_redis().set(f"{QUEUED_PREFIX}{user_id}", 1, nx=True, ex=QUEUED_TTL):
+            return
+    except redis.RedisError as e:
+        logger.warning(f"Dashboard debounce unavailable for user {user_id}: {str(e)}")
+    try:
+        task.delay(user_id)
+    except Exception as e:
+        logger.warning(f"Failed to queue dashboard refresh for user {user_id}: {str(e)}")
+
+
+def publish_queued_dashboard(user_id):
+    # Cleared before counting, so writes committed from here on queue
+    # another recompute rather than being missed.
+    try:
+        get_redis().delete(f"{QUEUED_PREFIX}{user_id}")
+    except redis.RedisError as e:
+        logger.warning(f"Dashboard debounce unavailable for user {user_id}: {str(e)}")
+    publish_dashboard(user_id)
+
+
+def refresh_dashboard(user_id):
+    """
+    Publish the recomputed dashboard counters of `user_id` once the current
+    transaction commits. Inside a batched_refresh() block (background jobs)
+    they are recomputed when it ends; otherwise the recompute is queued, to
+    keep its COUNT queries out of API requests.
+    """
+    if user_id is None:
+        return
+    users = _batch.get()
+    if users is not None:
+        users.add(user_id)
+    else:
+        transaction.on_commit(partial(queue_dashboard, user_id))
+
+
+@contextmanager
+def batched_refresh():
+    """
+    Coalesce dashboard refreshes in bulk jobs: every user touched inside the
+    block is refreshed once, when it exits.
+    """
+    users = set()
+    token = _batch.set(users)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+        for user_id in users:
+            transaction.on_commit(partial(publish_dashboard, user_id))
+
+
+def on_save(sender, instance, created, raw=False, **kwargs):
+    # Edits only move the counters when a reminder's time changes.
+    if not raw and (created or sender is Reminder):
+        refresh_dashboard(instance.user_id)
+
+
+def on_delete(sender, instance, **kwargs):
+    refresh_dashboard(instance.user_id)
+
+
+def connect():
+    for model in DASHBOARD_MODELS:
+        post_save.connect(on_save, sender=model, dispatch_uid=f"stream_save_{model.__name__}")
+        post_delete.connect(on_delete, sender=model, dispatch_uid=f"stream_delete_{model.__name__}")
+
+
+class Broadcaster:
+    """
+    One Redis pattern subscription per process, fanned out to in-memory
+    queues for each open stream. An idle connection costs a queue and a
+    sleeping coroutine, never a Redis connection of its own.
+    """
+
+    def __init__(self):
+        self.listeners = {}
+        self.task = None
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=settings.EVENT_STREAM_QUEUE_SIZE)
+        self.listeners.setdefault(user_id, set()).add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        queues = self.listeners.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.listeners[user_id]
+
+    async def run(self):
+        import redis.asyncio
+
+        while self.listeners:
+            client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                    async for message in pubsub.listen():
+                        if message['type'] == 'pmessage':
+                            self.dispatch(message['channel'], message['data'])
+            except redis.RedisError as e:
+                logger.warning(f"Event stream subscription lost, reconnecting: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+    def dispatch(self, channel, frame):
+        user_id = int(channel.decode().removeprefix(CHANNEL_PREFIX))
+        for queue in self.listeners.get(user_id, ()):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # A client that can't keep up misses events rather than
+                # growing memory; it will catch up on its next refresh.
+                pass
+
+
+broadcaster = Broadcaster()
+
+
+async def _event_frames(user_id):
+    queue = broadcaster.subscribe(user_id)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                frame = await asyncio.wait_for(queue.get(), settings.EVENT_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+            else:
+                yield frame
+    finally:
+        broadcaster.unsubscribe(user_id, queue)
+
+
+async def event_stream(request):
+    """
+    Server-Sent Events stream of reminder and dashboard events for the
+    authenticated user. EventSource can't send headers, so the knox token may
+    also be passed as `?token=`. Only served through core/asgi.py (uvicorn,
+    see deploy/): under WSGI every open stream would pin a gunicorn worker, so
+    there it answers 501.
+    """
+    # Web-only dependencies, kept out of the worker's import path.
+    from asgiref.sync import sync_to_async
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import JsonResponse, StreamingHttpResponse
+    from knox.auth import TokenAuthentication
+    from rest_framework.exceptions import AuthenticationFailed
+
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'message': 'The event stream is only served over ASGI.'}, status=501)
+
+    token = request.GET.get('token')
+    if not token:
+        header = request.headers.get('Authorization', '').split()
+        token = header[1] if len(header) == 2 and header[0] == 'Token' else None
+    if not token:
+        return JsonResponse({'message': 'Authentication credentials were not provided.'}, status=401)
+
+    try:
+        user, _ = await sync_to_async(TokenAuthentication().authenticate_credentials)(token.encode())
+    except AuthenticationFailed as e:
+        return JsonResponse({'message': str(e.detail)}, status=401)
+
+    response = StreamingHttpResponse(_event_frames(user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,174 +1,206 @@
+from datetime import timedelta
+from itertools import groupby
 from celery import shared_task
-from django.core.mail import EmailMultiAlternatives
+from django.apps import apps
+from django.core.mail import get_connection
+from django.db import transaction
 from django.utils import timezone
 from django.conf import settings
 from .models import Reminder
+from . import archive, emails, outbox, purge, recurrence, streams, webhooks
 import logging
 
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
 
-@shared_task
+@shared_task(ignore_result=True)
 def check_pending_reminders():
     """
     Celery task to check for pending reminders and send reminder emails.
     """
     try:
-        # Get all pending reminders where remind_at time has passed
-        pending_reminders = Reminder.objects.filter(
-            status='Pending',
-            remind_at__lte=timezone.now()
-        ).select_related('lead')
-
-        if not pending_reminders.exists():
-            logger.info("No pending reminders found.")
-            return
-
-        for reminder in pending_reminders:
-            if not reminder.lead.email:
-                logger.warning(f"Skipping reminder for lead {reminder.lead.name} (ID: {reminder.lead.id}) as no email is provided.")
-                continue
+        with streams.batched_refresh():
+            _refresh_crossed_reminders()
 
-            # Email details
-            subject = f"Mini CRM Reminder: Task for {reminder.lead.name}"
-            
-            # Plain-text body (for email clients that don't support HTML)
-            plain_message = f"""
-Dear {reminder.lead.name},
-
-This is a reminder for your task:
-{reminder.message}
-
-Lead: {reminder.lead.name}
-Due: {reminder.remind_at.strftime('%B %d, %Y %I:%M %p %Z')}
-
-Please contact us at support@minicrm.com if you need assistance.
-
-Best regards,
-Mini CRM Team
-"""
-
-            # HTML body for styled email
-            html_message = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <style>
-        body {{
-            font-family: Arial, sans-serif;
-            line-height: 1.6;
-            color: #333;
-            background-color: #f4f4f4;
-            margin: 0;
-            padding: 0;
-        }}
-        .container {{
-            max-width: 600px;
-            margin: 20px auto;
-            background: #fff;
-            padding: 20px;
-            border-radius: 8px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
-        .header {{
-            background: #007bff;
-            color: #fff;
-            padding: 10px 20px;
-            text-align: center;
-            border-radius: 8px 8px 0 0;
-        }}
-        .header h1 {{
-            margin: 0;
-            font-size: 24px;
-        }}
-        .content {{
-            padding: 20px;
-        }}
-        .content h2 {{
-            color: #007bff;
-            font-size: 20px;
-        }}
-        .content p {{
-            margin: 10px 0;
-        }}
-        .details {{
-            background: #f8f9fa;
-            padding: 15px;
-            border-radius: 5px;
-            margin: 10px 0;
-        }}
-        .details p {{
-            margin: 5px 0;
-        }}
-        .cta {{
-            display: inline-block;
-            padding: 10px 20px;
-            background: #007bff;
-            color: #fff;
-            text-decoration: none;
-            border-radius: 5px;
-            margin-top: 15px;
-        }}
-        .footer {{
-            text-align: center;
-            color: #777;
-            font-size: 12px;
-            padding: 10px;
-            border-top: 1px solid #eee;
-        }}
-        .footer a {{
-            color: #007bff;
-            text-decoration: none;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>Mini CRM Reminder</h1>
-        </div>
-        <div class="content">
-            <h2>Hello, {reminder.lead.name}</h2>
-            <p>We’re reaching out to remind you about an important task in Mini CRM.</p>
-            <div class="details">
-                <p><strong>Task:</strong> {reminder.message}</p>
-                <p><strong>Lead:</strong> {reminder.lead.name}</p>
-                <p><strong>Due:</strong> {reminder.remind_at.strftime('%B %d, %Y %I:%M %p %Z')}</p>
-            </div>
-            <p>Please take a moment to review this task in your Mini CRM account. If you need assistance, our support team is here to help.</p>
-            <a href="https://mini-crm-frontend.vercel.app" class="cta">View Task in Mini CRM</a>
-        </div>
-        <div class="footer">
-            <p>Mini CRM Team | <a href="mailto:support@minicrm.com">support@minicrm.com</a></p>
-            <p>© 2025 Mini CRM. All rights reserved.</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
-
-            logger.info(f"Sending reminder email to {reminder.lead.email} from {settings.EMAIL_HOST_USER}")
+            if settings.CRM_REMINDER_DIGEST_ENABLED:
+                send_reminder_digests()
+                return
 
-            try:
-                # Use EmailMultiAlternatives for plain text and HTML
-                email = EmailMultiAlternatives(
-                    subject=subject,
-                    body=plain_message,
-                    from_email=settings.EMAIL_HOST_USER,
-                    to=[reminder.lead.email],
-                )
-                # Attach HTML version
-                email.attach_alternative(html_message, 'text/html')
-                email.send(fail_silently=False)
-
-                # Update reminder status
-                reminder.status = 'Complete'
-                reminder.save()
+            # Get all pending reminders where remind_at time has passed
+            pending_reminders = Reminder.objects.filter(
+                status='Pending',
+                remind_at__lte=timezone.now()
+            ).select_related('lead')
+
+            if not pending_reminders.exists():
+                logger.info("No pending reminders found.")
+                return
+
+            # Reuse one SMTP connection for the whole run
+            with get_connection() as connection:
+                for reminder in pending_reminders:
+                    if not reminder.lead.email:
+                        logger.warning(f"Skipping reminder for lead {reminder.lead.name} (ID: {reminder.lead.id}) as no email is provided.")
+                        continue
+
+                    logger.info(f"Sending reminder email to {reminder.lead.email} from {settings.EMAIL_HOST_USER}")
+
+                    try:
+                        emails.send_email(reminder.lead.email, emails.render_reminder_email(reminder), connection)
+
+                        # Update reminder status and queue up the next occurrence
+                        with transaction.atomic():
+                            reminder.status = 'Complete'
+                            reminder.save()
+                            _schedule_next([reminder])
 
+                        _publish_due(reminder)
+
+                    except Exception as e:
+                        logger.error(f"Failed to send reminder email to {reminder.lead.email}: {str(e)}")
+
+    except Exception as e:
+        logger.critical(f"Critical error in check_pending_reminders task: {str(e)}")
+
+def send_reminder_digests():
+    """
+    Digest mode: one email per recipient covering every reminder due now,
+    plus any of theirs falling due within CRM_REMINDER_DIGEST_WINDOW seconds.
+    Each group is marked Complete with a single UPDATE.
+    """
+    now = timezone.now()
+    horizon = now + timedelta(seconds=settings.CRM_REMINDER_DIGEST_WINDOW)
+    due = (
+        Reminder.objects.filter(status='Pending', remind_at__lte=horizon)
+        .select_related('lead')
+        .order_by('lead__email', 'remind_at')
+    )
+
+    sent = 0
+    with get_connection() as connection:
+        for email, group in groupby(due.iterator(chunk_size=2000), key=lambda reminder: reminder.lead.email):
+            group = list(group)
+            # Nothing for this recipient is due yet; they'll be picked up later.
+            if group[0].remind_at > now:
+                continue
+            if not email:
+                logger.warning(f"Skipping {len(group)} reminder(s) for lead {group[0].lead.name} as no email is provided.")
+                continue
+
+            logger.info(f"Sending digest of {len(group)} reminder(s) to {email} from {settings.EMAIL_HOST_USER}")
+            try:
+                emails.send_email(email, emails.render_digest_email(group), connection)
             except Exception as e:
-                logger.error(f"Failed to send reminder email to {reminder.lead.email}: {str(e)}")
+                logger.error(f"Failed to send reminder digest to {email}: {str(e)}")
+                continue
+
+            with transaction.atomic():
+                Reminder.objects.filter(pk__in=[reminder.pk for reminder in group]).update(status='Complete')
+                for reminder in group:
+                    reminder.status = 'Complete'
+                    streams.refresh_dashboard(reminder.user_id)
+                outbox.record_events(group, 'updated')
+                _schedule_next(group)
+
+            for reminder in group:
+                _publish_due(reminder)
+            sent += 1
+
+    logger.info(f"Sent {sent} reminder digest(s)")
+
+def _refresh_crossed_reminders():
+    """
+    The dashboard counts reminders still ahead, so its count drops as they
+    fall due even when nothing is written. Refresh the users whose reminders
+    crossed over since the previous sweep.
+    """
+    now = timezone.now()
+    interval = timedelta(seconds=settings.CELERY_BEAT_SCHEDULE['check-pending-reminders']['schedule'])
+    crossed = (
+        Reminder.objects.filter(remind_at__gt=now - interval, remind_at__lte=now)
+        .order_by()
+        .values_list('user_id', flat=True)
+        .distinct()
+    )
+    for user_id in crossed:
+        streams.refresh_dashboard(user_id)
 
+@shared_task(ignore_result=True)
+def publish_dashboard(user_id):
+    """
+    Celery task to publish the recomputed dashboard counters of a user to
+    their open event streams, queued by streams.refresh_dashboard.
+    """
+    streams.publish_queued_dashboard(user_id)
+
+def _schedule_next(reminders):
+    # In a savepoint of its own: the reminders are already emailed, so a
+    # failure here must not roll back their Complete status and send them
+    # again on the next sweep.
+    try:
+        with transaction.atomic():
+            recurrence.schedule_next(reminders)
     except Exception as e:
-        logger.critical(f"Critical error in check_pending_reminders task: {str(e)}")
\ No newline at end of file
+        logger.error(f"Failed to schedule the next occurrence of reminders {[r.id for r in reminders]}: {str(e)}")
+
+def _publish_due(reminder):
+    streams.publish(reminder.user_id, 'reminder.due', {
+        'id': reminder.id,
+        'message': reminder.message,
+        'remind_at': reminder.remind_at,
+        'lead': {'id': reminder.lead.id, 'name': reminder.lead.name},
+    })
+
+@shared_task(bind=True)
+def purge_leads(self, user_id, lead_ids):
+    """
+    Celery task to delete a batch of leads and everything attached to them.
+    Progress is published as task state so clients can poll it.
+    """
+    def report(done, total):
+        self.update_state(state='PROGRESS', meta={'user_id': user_id, 'done': done, 'total': total})
+
+    deleted = purge.purge_leads(lead_ids, progress=report)
+    streams.refresh_dashboard(user_id)
+    return {'user_id': user_id, 'done': deleted, 'total': len(lead_ids)}
+
+@shared_task(bind=True)
+def purge_account(self, user_id):
+    """
+    Celery task to delete a user account and its whole book of leads.
+    """
+    def report(done, total):
+        self.update_state(state='PROGRESS', meta={'user_id': user_id, 'done': done, 'total': total})
+
+    deleted = purge.purge_account(user_id, progress=report)
+    return {'user_id': user_id, 'done': deleted, 'total': deleted}
+
+@shared_task(ignore_result=True)
+def purge_records(model_name, ids):
+    """
+    Celery task to delete contacts, notes or reminders by id in batches.
+    """
+    purge.purge_rows(apps.get_model('crm', model_name), ids)
+
+@shared_task(ignore_result=True)
+def deliver_outbox_events():
+    """
+    Celery task to push pending outbox events to webhook endpoints.
+    """
+    delivered = webhooks.deliver_pending()
+    if delivered:
+        logger.info(f"Delivered {delivered} outbox event(s)")
+
+@shared_task(ignore_result=True)
+def archive_stale_records():
+    """
+    Celery task to move completed reminders and old notes to the archive tables.
+    """
+    archive.archive_stale_records()
+
+@shared_task(ignore_result=True)
+def purge_expired_tokens():
+    """
+    Celery task to delete expired auth tokens in batches.
+    """
+    purge.purge_expired_tokens()
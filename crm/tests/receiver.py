@@ -0,0 +1,55 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
+
+class WebhookReceiver:
+    """
+    A local HTTP endpoint standing in for a webhook consumer. Every POST is
+    recorded as (headers, raw body, parsed body); `statuses` lists the status
+    codes to answer with, in order, after which it answers 200.
+
+        with WebhookReceiver() as receiver:
+            WebhookEndpoint.objects.create(url=receiver.url, secret='s')
+    """
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.requests = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/hooks/"
+
+    @property
+    def events(self):
+        return [event for _, _, body in self.requests for event in body['events']]
+
+    def __enter__(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers['Content-Length']))
+                with receiver._lock:
+                    status = receiver.statuses.pop(0) if receiver.statuses else 200
+                    if status < 300:
+                        receiver.requests.append((self.headers, raw, json.loads(raw)))
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
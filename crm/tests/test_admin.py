@@ -0,0 +1,37 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase
+from crm.models import Contact, Lead, Note
+
+
+@mock.patch('crm.admin.purge_records.delay')
+@mock.patch('crm.admin.purge_leads.delay')
+class AdminDeleteTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.force_login(self.admin)
+        self.lead = Lead.objects.create(user=self.admin, name='Acme', email='acme@example.com')
+        self.notes = Note.objects.bulk_create(Note(user=self.admin, lead=self.lead, content=f"Note {n}") for n in range(50))
+        Contact.objects.create(user=self.admin, lead=self.lead, name='Jo', email='jo@example.com')
+
+    def test_confirmation_counts_children_without_loading_them(self, purge_leads, purge_records):
+        # Session, user, lead and one count per child table.
+        with self.assertNumQueries(8):
+            response = self.client.get(f"/admin/crm/lead/{self.lead.pk}/delete/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(dict(response.context['model_count']), {'leads': 1, 'contacts': 1, 'notes': 50})
+
+    def test_delete_lead_is_queued_after_commit(self, purge_leads, purge_records):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/admin/crm/lead/{self.lead.pk}/delete/", {'post': 'yes'})
+        self.assertRedirects(response, '/admin/crm/lead/')
+        purge_leads.assert_called_once_with(self.admin.pk, [self.lead.pk])
+        self.assertTrue(Lead.objects.filter(pk=self.lead.pk).exists())
+
+    def test_delete_note_is_queued(self, purge_leads, purge_records):
+        note = self.notes[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/admin/crm/note/{note.pk}/delete/", {'post': 'yes'})
+        purge_records.assert_called_once_with('Note', [note.pk])
+        self.assertTrue(Note.objects.filter(pk=note.pk).exists())
@@ -0,0 +1,49 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from crm.models import ArchivedNote, ArchivedReminder, Lead, Note, Reminder
+from .utils import api_client, create_user
+
+
+class ArchivedListTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = api_client(self.user)
+        self.lead = Lead.objects.create(user=self.user, name='Acme', email='buyer@example.com')
+        now = timezone.now()
+        # Hot and archived rows interleave in time.
+        for days in (1, 3, 5):
+            Reminder.objects.create(user=self.user, lead=self.lead, message=f"hot {days}", remind_at=now + timedelta(days=days))
+            ArchivedReminder.objects.create(
+                id=1000 + days, user=self.user, lead=self.lead, message=f"archived {days + 1}",
+                status='Complete', remind_at=now + timedelta(days=days + 1), created_at=now, archived_at=now,
+            )
+        for days in (2, 4):
+            Note.objects.filter(pk=Note.objects.create(user=self.user, lead=self.lead, content=f"hot {days}").pk).update(
+                created_at=now - timedelta(days=days)
+            )
+            ArchivedNote.objects.create(
+                id=2000 + days, user=self.user, lead=self.lead, content=f"archived {days + 1}",
+                created_at=now - timedelta(days=days + 1), archived_at=now,
+            )
+
+    def messages(self, url, field):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [row[field] for row in response.json()['data']]
+
+    def test_ordered_reminders_merge_archived_rows(self):
+        expected = ['hot 1', 'archived 2', 'hot 3', 'archived 4', 'hot 5', 'archived 6']
+        self.assertEqual(self.messages('/api/reminders/?include_archived=1&ordering=remind_at', 'message'), expected)
+        self.assertEqual(self.messages('/api/reminders/?include_archived=1&ordering=-remind_at', 'message'), expected[::-1])
+
+    def test_ordered_notes_merge_archived_rows(self):
+        self.assertEqual(
+            self.messages('/api/notes/?include_archived=1&ordering=-created_at', 'content'),
+            ['hot 2', 'archived 3', 'hot 4', 'archived 5'],
+        )
+
+    def test_unordered_lists_include_archived_rows(self):
+        self.assertEqual(len(self.messages('/api/reminders/?include_archived=1', 'message')), 6)
+        self.assertEqual(len(self.messages('/api/reminders/', 'message')), 3)
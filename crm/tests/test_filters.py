@@ -0,0 +1,127 @@
+from datetime import timedelta
+from itertools import combinations
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase
+from django.utils import timezone
+from crm.filters import ContactFilter, LeadFilter, NoteFilter, ReminderFilter
+from crm.models import ArchivedNote, ArchivedReminder, Lead
+from .utils import api_client, create_user
+import warnings
+
+# Every filter class with the tables it is applied to.
+FILTERED_MODELS = [
+    (LeadFilter, [Lead]),
+    (ContactFilter, [ContactFilter.model]),
+    (NoteFilter, [NoteFilter.model, ArchivedNote]),
+    (ReminderFilter, [ReminderFilter.model, ArchivedReminder]),
+]
+
+
+def combinations_of(filter_class):
+    """
+    Every (exact fields, sort) pair a client could ask for, where sort is None,
+    a range filter or an ordering in either direction.
+    """
+    sorts = [None]
+    sorts += [('range', name) for name in filter_class.range_fields]
+    sorts += [('ordering', prefix + name) for name in filter_class.ordering_fields for prefix in ('', '-')]
+    for size in range(len(filter_class.exact_fields) + 1):
+        for exact in combinations(filter_class.exact_fields, size):
+            for sort in sorts:
+                yield exact, sort
+
+
+class FilterRequestTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = api_client(self.user)
+
+    def test_errors_use_the_error_envelope(self):
+        for query, field in (
+            ('ordering=email', 'ordering'),
+            ('status=New&ordering=name', 'filters'),
+            ('created_at__gte=yesterday', 'created_at'),
+        ):
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/leads/?{query}")
+                self.assertEqual(response.status_code, 400)
+                body = response.json()
+                self.assertEqual(body['message'], 'Invalid filters')
+                self.assertIn(field, body['errors'])
+
+        response = self.client.get('/api/reminders/?include_archived=1&status=Pending&lead=1')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']), ['filters'])
+
+    def test_naive_datetimes_are_read_as_current_timezone(self):
+        Lead.objects.create(user=self.user, name='Old', email='old@example.com')
+        Lead.objects.filter(user=self.user).update(created_at=timezone.now() - timedelta(days=400))
+        Lead.objects.create(user=self.user, name='New', email='new@example.com')
+
+        start = (timezone.now() - timedelta(days=1)).date().isoformat()
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            response = self.client.get(f"/api/leads/?created_at__gte={start}&ordering=created_at")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([lead['name'] for lead in response.json()['data']], ['New'])
+            response = self.client.get(f"/api/leads/?created_at__gte={start}T00:00:00")
+            self.assertEqual(response.status_code, 200)
+
+
+class IndexedFilterPlanTests(TestCase):
+    """
+    Every combination a filter accepts must be answered from an index,
+    without a sequential scan or a sort.
+    """
+
+    def setUp(self):
+        self.user = create_user()
+        self.lead = Lead.objects.create(user=self.user, name='Acme', email='buyer@example.com')
+        self.values = {
+            'status': 'Pending',
+            'company': 'Acme',
+            'lead': str(self.lead.id),
+        }
+        with connection.cursor() as cursor:
+            # Make the planner take any usable index even on empty tables;
+            # a seq scan or sort left in the plan means there is none.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+
+    def params(self, exact, sort):
+        params = QueryDict(mutable=True)
+        for name in exact:
+            params[name] = self.values[name]
+        if sort and sort[0] == 'range':
+            params[f"{sort[1]}__gte"] = timezone.now().isoformat()
+        elif sort:
+            params['ordering'] = sort[1]
+        return params
+
+    def test_accepted_combinations_use_an_index(self):
+        accepted = 0
+        for filter_class, models in FILTERED_MODELS:
+            for exact, sort in combinations_of(filter_class):
+                filters = filter_class(self.params(exact, sort))
+                sort_field = sort[1].lstrip('-') if sort else None
+                with self.subTest(filter=filter_class.__name__, exact=exact, sort=sort):
+                    self.assertEqual(filters.is_valid(), filter_class.is_indexed(set(exact), sort_field))
+                if not filters.is_valid():
+                    continue
+
+                accepted += 1
+                for model in models:
+                    plan = filters.filter_queryset(model.objects.filter(user=self.user)).explain()
+                    with self.subTest(model=model.__name__, exact=exact, sort=sort):
+                        self.assertNotIn('Seq Scan', plan)
+                        self.assertNotIn('Sort', plan)
+                        self.assertIn('Index', plan)
+        self.assertGreater(accepted, 10)
+
+    def test_unindexed_combinations_are_rejected(self):
+        for query in ('status=New&company=Acme', 'status=New&ordering=name', 'company=Acme&ordering=-name'):
+            with self.subTest(query=query):
+                self.assertFalse(LeadFilter(QueryDict(query)).is_valid())
+        self.assertFalse(ReminderFilter(QueryDict('status=Pending&lead=1')).is_valid())
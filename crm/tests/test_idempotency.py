@@ -0,0 +1,92 @@
+from unittest import mock, skipUnless
+from django.test import TestCase, override_settings
+from crm import redis_client
+from crm.models import Lead
+from crm.views import LeadSerializer
+from .utils import RedisTestMixin, api_client, create_user, redis_available
+import time
+
+LEAD = {'name': 'Acme', 'email': 'acme@example.com', 'phone': '555-0100'}
+
+
+class IdempotencyMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client = api_client(self.user)
+
+    def post(self, data=LEAD, key='key-1'):
+        return self.client.post('/api/leads/', data, format='json', headers={'Idempotency-Key': key})
+
+    def lock_key(self, key='key-1'):
+        return f"idempotency:{self.user.pk}:POST:/api/leads/:{key}:lock"
+
+
+@skipUnless(redis_available(), 'Redis is not running')
+class IdempotencyTests(IdempotencyMixin, RedisTestMixin, TestCase):
+
+    def test_retry_replays_the_first_response(self):
+        first = self.post()
+        second = self.post()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(Lead.objects.count(), 1)
+
+    def test_reused_key_with_another_payload_is_rejected(self):
+        self.post()
+        response = self.post({**LEAD, 'name': 'Globex'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Lead.objects.count(), 1)
+
+    @override_settings(IDEMPOTENCY_LOCK_TIMEOUT_MS=200)
+    def test_concurrent_request_with_the_same_key_gets_409(self):
+        redis_client.get_redis().set(self.lock_key(), 'other-request')
+        response = self.post()
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Lead.objects.exists())
+        # Another request's lock is left alone.
+        self.assertEqual(redis_client.get_redis().get(self.lock_key()), b'other-request')
+
+    @override_settings(IDEMPOTENCY_LOCK_TIMEOUT_MS=300)
+    def test_lock_is_kept_while_the_handler_runs(self):
+        save = LeadSerializer.save
+        held = []
+
+        def slow_save(serializer, **kwargs):
+            time.sleep(0.6)
+            held.append(redis_client.get_redis().pttl(self.lock_key()))
+            return save(serializer, **kwargs)
+
+        with mock.patch.object(LeadSerializer, 'save', slow_save):
+            self.post()
+        self.assertGreater(held[0], 0)
+        self.assertIsNone(redis_client.get_redis().get(self.lock_key()))
+
+    def test_release_leaves_a_lock_taken_over_by_another_request(self):
+        save = LeadSerializer.save
+
+        def expired_save(serializer, **kwargs):
+            # As if the lock had expired and a retry had taken it.
+            redis_client.get_redis().set(self.lock_key(), 'retry')
+            return save(serializer, **kwargs)
+
+        with mock.patch.object(LeadSerializer, 'save', expired_save):
+            self.post()
+        self.assertEqual(redis_client.get_redis().get(self.lock_key()), b'retry')
+
+
+@override_settings(REDIS_URL='redis://localhost:1/0', REDIS_SOCKET_TIMEOUT=0.1)
+class RedisDownTests(IdempotencyMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        redis_client._client = None
+        self.addCleanup(setattr, redis_client, '_client', None)
+
+    def test_requests_go_through_without_the_store(self):
+        with self.assertLogs('crm.idempotency', 'WARNING'):
+            self.assertEqual(self.post().status_code, 200)
+            self.assertEqual(self.post().status_code, 200)
+        self.assertEqual(Lead.objects.count(), 2)
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from unittest import mock, skipUnless
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from crm.models import Contact, Lead, Note, Reminder
+from .utils import RedisTestMixin, api_client, create_user, redis_available
+
+
+@mock.patch('crm.views.purge_leads.delay', return_value=mock.Mock(id='task-id'))
+class LeadBulkDeleteTests(TestCase):
+    url = '/api/leads/bulk-delete/'
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = api_client(self.user)
+
+    def test_rejects_malformed_ids(self, delay):
+        for ids in (None, [], 'abc', ['abc'], [{}], [1, '2'], [True], [1.5]):
+            with self.subTest(ids=ids):
+                response = self.client.post(self.url, {'ids': ids}, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['message'], 'Lead deletion failed')
+                self.assertIn('ids', response.json()['errors'])
+        delay.assert_not_called()
+
+    @override_settings(CRM_BULK_DELETE_MAX_IDS=3)
+    def test_caps_list_length(self, delay):
+        response = self.client.post(self.url, {'ids': [1, 2, 3, 4]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], {'ids': ['At most 3 lead ids can be deleted per request.']})
+        delay.assert_not_called()
+
+    def test_queues_only_own_leads(self, delay):
+        own = Lead.objects.create(user=self.user, name='Own', email='own@example.com')
+        other = Lead.objects.create(user=create_user('bob'), name='Other', email='other@example.com')
+        response = self.client.post(self.url, {'ids': [own.id, other.id]}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['data'], {'task_id': 'task-id', 'total': 1})
+        delay.assert_called_once_with(self.user.id, [own.id])
+
+
+@override_settings(CRM_LEAD_BUNDLE_CHILD_LIMIT=2)
+class LeadBundleTests(TestCase):
+    # Token authentication (3), the leads with their child counts, and one
+    # prefetch per expanded type, however many leads there are.
+    QUERIES = 7
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = api_client(self.user)
+
+    def create_leads(self, count):
+        leads = Lead.objects.bulk_create(
+            Lead(user=self.user, name=f"Lead {n}", email=f"lead{n}@example.com") for n in range(count)
+        )
+        for lead in leads:
+            Contact.objects.bulk_create(
+                Contact(user=self.user, lead=lead, name=f"Contact {n}", email=f"c{n}@example.com") for n in range(3)
+            )
+            Note.objects.bulk_create(Note(user=self.user, lead=lead, content=f"Note {n}") for n in range(3))
+            Reminder.objects.bulk_create(
+                Reminder(user=self.user, lead=lead, message=f"Reminder {n}", remind_at=timezone.now() + timedelta(days=n))
+                for n in range(3)
+            )
+        return leads
+
+    def test_expanded_list_query_count_does_not_grow_with_leads(self):
+        for count in (2, 22):
+            with self.subTest(count=count):
+                Lead.objects.all().delete()
+                self.create_leads(count)
+                with self.assertNumQueries(self.QUERIES):
+                    response = self.client.get('/api/leads/', {'expand': 'contacts,notes,reminders'})
+                self.assertEqual(len(response.data['data']), count)
+
+    def test_children_are_capped_and_counted(self):
+        self.create_leads(1)
+        with self.assertNumQueries(self.QUERIES - 2):
+            response = self.client.get('/api/leads/', {'expand': 'notes'})
+        [lead] = response.data['data']
+        self.assertEqual((lead['contact_count'], lead['note_count'], lead['reminder_count']), (3, 3, 3))
+        self.assertEqual([note['content'] for note in lead['notes']], ['Note 2', 'Note 1'])
+        self.assertNotIn('contacts', lead)
+
+    def test_bundle(self):
+        [lead] = self.create_leads(1)
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(f"/api/leads/{lead.pk}/bundle/")
+        data = response.data['data']
+        self.assertEqual(len(data['contacts']), 2)
+        self.assertEqual(len(data['reminders']), 2)
+
+    def test_unknown_expand_is_rejected(self):
+        response = self.client.get('/api/leads/', {'expand': 'notes,deals'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'], {'expand': ['Unknown relation(s): deals']})
+
+
+@skipUnless(redis_available(), 'Redis is not running')
+class PurgeStatusTests(RedisTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        delay = mock.patch('crm.views.purge_leads.delay', return_value=mock.Mock(id='task-id'))
+        delay.start()
+        self.addCleanup(delay.stop)
+        async_result = mock.patch('crm.views.AsyncResult', return_value=mock.Mock(state='PENDING', info=None))
+        self.async_result = async_result.start()
+        self.addCleanup(async_result.stop)
+        self.user = create_user()
+        self.client = api_client(self.user)
+        lead = Lead.objects.create(user=self.user, name='Own', email='own@example.com')
+        self.client.post('/api/leads/bulk-delete/', {'ids': [lead.id]}, format='json')
+
+    def test_owner_can_poll_a_pending_task(self):
+        response = self.client.get('/api/purges/task-id/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'], {'state': 'PENDING', 'done': 0, 'total': None})
+
+    def test_other_users_and_unknown_tasks_are_not_found(self):
+        self.assertEqual(api_client(create_user('bob')).get('/api/purges/task-id/').status_code, 404)
+        self.assertEqual(self.client.get('/api/purges/other-task/').status_code, 404)
+        self.async_result.assert_not_called()
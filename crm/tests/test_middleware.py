@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from crm.middleware import CompressionMiddleware, accepts_encoding
+from crm.renderers import ORJSONRenderer
+import brotli
+import gzip
+import json
+
+BODY = json.dumps([{'id': n, 'name': f"Lead {n}", 'status': 'New'} for n in range(200)]).encode()
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+
+    def compress(self, body=BODY, **headers):
+        request = RequestFactory().get('/api/leads/', **headers)
+        middleware = CompressionMiddleware(lambda request: HttpResponse(body, content_type='application/json'))
+        return middleware(request)
+
+    def test_brotli_without_cookies(self):
+        response = self.compress(HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), BODY)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip_with_breach_mitigation_when_cookies_are_sent(self):
+        response = self.compress(HTTP_ACCEPT_ENCODING='gzip, br', HTTP_COOKIE='sessionid=abc')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        # Django pads the gzip header with a random-length filename.
+        lengths = {
+            len(self.compress(HTTP_ACCEPT_ENCODING='gzip', HTTP_COOKIE='sessionid=abc').content) for _ in range(20)
+        }
+        self.assertGreater(len(lengths), 1)
+
+    def test_respects_q_zero_and_small_bodies(self):
+        self.assertEqual(self.compress(HTTP_ACCEPT_ENCODING='br;q=0, gzip')['Content-Encoding'], 'gzip')
+        self.assertFalse(self.compress(HTTP_ACCEPT_ENCODING='identity').has_header('Content-Encoding'))
+        self.assertFalse(self.compress(b'{}', HTTP_ACCEPT_ENCODING='br').has_header('Content-Encoding'))
+
+    def test_accepts_encoding(self):
+        self.assertTrue(accepts_encoding('gzip, BR;q=0.5', 'br'))
+        self.assertFalse(accepts_encoding('gzip, br;q=0', 'br'))
+        self.assertFalse(accepts_encoding('brotli', 'br'))
+
+
+class ORJSONRendererTests(SimpleTestCase):
+
+    def test_utc_datetimes_match_drf(self):
+        value = datetime(2026, 11, 2, 9, 0, tzinfo=timezone.utc)
+        self.assertEqual(ORJSONRenderer().render({'at': value}), b'{"at":"2026-11-02T09:00:00Z"}')
@@ -0,0 +1,42 @@
+from unittest import mock, skipUnless
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from crm import profiling
+from crm.profiling import recent_profiles
+from .utils import RedisTestMixin, api_client, create_user, redis_available
+
+
+@skipUnless(redis_available(), 'Redis is not running')
+@override_settings(CRM_PROFILING_ENABLED=True, CRM_PROFILING_SAMPLE_RATE=0)
+class ProfilingHeaderTests(RedisTestMixin, TestCase):
+    url = '/api/leads/'
+
+    def get(self, client):
+        # The profiler must not even start for a caller who isn't staff.
+        with mock.patch.object(profiling, 'Profile', wraps=profiling.Profile) as profile:
+            response = client.get(self.url, HTTP_X_PROFILE='1')
+        response.profiled = profile.called
+        return response
+
+    def test_anonymous_header_is_ignored(self):
+        client = APIClient()
+        response = self.get(client)
+        self.assertEqual((response.status_code, response.profiled), (401, False))
+        client.credentials(HTTP_AUTHORIZATION='Token not-a-real-token')
+        response = self.get(client)
+        self.assertEqual((response.status_code, response.profiled), (401, False))
+        self.assertEqual(recent_profiles(), [])
+
+    def test_non_staff_header_is_ignored(self):
+        response = self.get(api_client(create_user()))
+        self.assertEqual((response.status_code, response.profiled), (200, False))
+        self.assertEqual(recent_profiles(), [])
+
+    def test_staff_token_is_profiled(self):
+        user = create_user()
+        user.is_staff = True
+        user.save()
+        response = self.get(api_client(user))
+        self.assertEqual((response.status_code, response.profiled), (200, True))
+        [profile] = recent_profiles()
+        self.assertEqual((profile['kind'], profile['name'], profile['status']), ('request', self.url, 200))
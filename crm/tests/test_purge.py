@@ -0,0 +1,31 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from knox.models import AuthToken
+from crm import purge
+from crm.models import Lead
+from .utils import create_user
+
+
+class TokenPurgeTests(TestCase):
+    # The worker runs without knox installed, so tokens are purged by table name.
+
+    def test_purge_expired_tokens(self):
+        user = create_user()
+        expired, _ = AuthToken.objects.create(user)
+        live, _ = AuthToken.objects.create(user)
+        AuthToken.objects.filter(pk=expired.pk).update(expiry=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(purge.purge_expired_tokens(batch_size=1), 1)
+        self.assertEqual(list(AuthToken.objects.values_list('pk', flat=True)), [live.pk])
+
+    def test_purge_account_deletes_tokens(self):
+        user, other = create_user(), create_user('bob')
+        AuthToken.objects.create(user)
+        AuthToken.objects.create(other)
+        Lead.objects.create(user=user, name='Acme', email='acme@example.com')
+
+        self.assertEqual(purge.purge_account(user.pk), 1)
+        self.assertFalse(User.objects.filter(pk=user.pk).exists())
+        self.assertEqual(list(AuthToken.objects.values_list('user_id', flat=True)), [other.pk])
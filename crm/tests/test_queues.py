@@ -0,0 +1,102 @@
+from datetime import timedelta
+from unittest import mock, skipUnless
+from celery import Celery
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+from django.utils import timezone
+from core.celery import app as default_app
+from crm import redis_client
+from crm.models import Lead, Reminder
+from . import worker
+from .utils import TEST_REDIS_URL, RedisTestMixin, create_user, redis_available
+import os
+import subprocess
+import sys
+import time
+
+# Queues each worker profile consumes (see the comment in core.settings).
+WORKER_QUEUES = {
+    'reminders': ['reminders'],
+    'webhooks': ['webhooks'],
+    'bulk': ['bulk'],
+    'maintenance': ['maintenance', 'default'],
+}
+
+
+class TaskRoutingTests(SimpleTestCase):
+
+    def test_only_the_sweep_reaches_the_reminders_worker(self):
+        router = default_app.amqp.router
+        for name in sorted(name for name in default_app.tasks if name.startswith('crm.')):
+            queue = router.route({}, name)['queue'].name
+            self.assertNotEqual(queue, settings.CELERY_TASK_DEFAULT_QUEUE, name)
+            self.assertEqual(queue == 'reminders', name == 'crm.tasks.check_pending_reminders', name)
+
+
+@skipUnless(redis_available(), 'Redis is not running')
+class ReminderLatencyTests(RedisTestMixin, TransactionTestCase):
+    """
+    A real worker process per profile (crm.tests.worker) on the scratch Redis
+    database: a reminder sweep sent while bulk and webhook jobs are running
+    is still handled at once.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.app = Celery('test', broker=TEST_REDIS_URL, set_as_current=False)
+        self.app.conf.update(
+            task_queues=settings.CELERY_TASK_QUEUES,
+            task_default_queue=settings.CELERY_TASK_DEFAULT_QUEUE,
+            task_routes=settings.CELERY_TASK_ROUTES,
+        )
+        self.redis = redis_client.get_redis()
+        # Writes here commit, so their dashboard refreshes would be queued on
+        # the default broker rather than the test one.
+        patcher = mock.patch('crm.tasks.publish_dashboard.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def start_workers(self):
+        env = {
+            **os.environ,
+            'DB_NAME': connection.settings_dict['NAME'],
+            'CELERY_BROKER_URL': TEST_REDIS_URL,
+            'CELERY_RESULT_BACKEND': TEST_REDIS_URL,
+            'REDIS_URL': TEST_REDIS_URL,
+        }
+        for name, queues in WORKER_QUEUES.items():
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'crm.tests.worker', name, ','.join(queues)],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            self.addCleanup(process.wait, 30)
+            self.addCleanup(process.terminate)
+        self.addCleanup(self.redis.rpush, worker.RELEASE_KEY, 1)
+
+        deadline = time.monotonic() + 30
+        while len(self.app.control.ping(timeout=0.5)) < len(WORKER_QUEUES):
+            self.assertLess(time.monotonic(), deadline, 'workers did not start')
+
+    def test_sweep_is_not_delayed_by_heavy_jobs(self):
+        user = create_user()
+        lead = Lead.objects.create(user=user, name='Acme', email='acme@example.com')
+        reminder = Reminder.objects.create(
+            user=user, lead=lead, message='Call back', remind_at=timezone.now() - timedelta(minutes=1)
+        )
+        self.start_workers()
+
+        self.app.send_task('crm.tasks.purge_leads', (user.pk, [lead.pk]))
+        self.app.send_task('crm.tasks.deliver_outbox_events')
+        deadline = time.monotonic() + 10
+        while self.redis.llen(worker.STARTED_KEY) < 2:
+            self.assertLess(time.monotonic(), deadline, 'heavy jobs did not start')
+            time.sleep(0.05)
+
+        start = time.monotonic()
+        self.app.send_task('crm.tasks.check_pending_reminders')
+        while Reminder.objects.get(pk=reminder.pk).status != 'Complete':
+            self.assertLess(time.monotonic() - start, 5, 'reminder sweep waited behind heavy jobs')
+            time.sleep(0.05)
+        # Both heavy jobs are still blocked.
+        self.assertEqual(self.redis.llen(worker.RELEASE_KEY), 0)
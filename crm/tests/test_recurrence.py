@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from django.core import mail
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone as django_timezone
+from crm import recurrence, tasks
+from crm.models import Lead, Reminder
+from .utils import api_client, create_user
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class MovedOccurrenceTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = api_client(self.user)
+        self.lead = Lead.objects.create(user=self.user, name='Acme', email='acme@example.com')
+        response = self.client.post('/api/reminders/', {
+            'lead_id': self.lead.pk, 'message': 'Weekly call',
+            'remind_at': '2026-11-02T09:00:00Z', 'recurrence': 'FREQ=WEEKLY',
+        }, format='json')
+        self.reminder = Reminder.objects.get(pk=response.data['data']['id'])
+
+    def move(self, remind_at):
+        response = self.client.put(f"/api/reminders/{self.reminder.pk}/", {
+            'lead_id': self.lead.pk, 'message': 'Weekly call', 'remind_at': remind_at, 'recurrence': 'FREQ=WEEKLY',
+        }, format='json')
+        self.assertEqual(response.data['data']['occurrence_at'], '2026-11-02T09:00:00Z')
+        self.reminder.refresh_from_db()
+
+    def test_moved_earlier_does_not_repeat_its_slot(self):
+        self.move('2026-11-01T09:00:00Z')
+        self.assertEqual(recurrence.next_occurrence(self.reminder), utc(2026, 11, 9, 9))
+
+        [upcoming] = recurrence.schedule_next([self.reminder])
+        self.assertEqual((upcoming.remind_at, upcoming.occurrence_at), (utc(2026, 11, 9, 9), utc(2026, 11, 9, 9)))
+
+        occurrences = recurrence.occurrences(self.user, utc(2026, 10, 30), utc(2026, 11, 20), 10)
+        self.assertEqual(
+            [remind_at for remind_at, reminder, _ in occurrences if reminder.pk == self.reminder.pk],
+            [utc(2026, 11, 1, 9), utc(2026, 11, 9, 9), utc(2026, 11, 16, 9)],
+        )
+
+    def test_moved_later_continues_after_it(self):
+        self.move('2026-11-03T09:00:00Z')
+        self.assertEqual(recurrence.next_occurrence(self.reminder), utc(2026, 11, 9, 9))
+
+
+class InvalidRuleTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = api_client(self.user)
+        self.lead = Lead.objects.create(user=self.user, name='Acme', email='acme@example.com')
+
+    def test_rules_that_cannot_be_evaluated_are_rejected(self):
+        for rule in [
+            'FREQ=WEEKLY;INTERVAL=0',
+            'FREQ=HOURLY;BYHOUR=25',
+            'FREQ=HOURLY;BYMINUTE=0,1,2',
+            'FREQ=DAILY;BYSECOND=5',
+            'FREQ=DAILY;BYSETPOS=2',
+            'FREQ=MONTHLY;BYDAY=+6MO',
+            'FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=30',
+            'FREQ=MONTHLY;BYDAY=MO;BYMONTHDAY=1;BYMONTH=1;BYSETPOS=5',
+        ]:
+            with self.subTest(rule=rule):
+                response = self.client.post('/api/reminders/', {
+                    'lead_id': self.lead.pk, 'message': 'Call', 'remind_at': '2026-11-02T09:00:00Z', 'recurrence': rule,
+                }, format='json')
+                self.assertIn('recurrence', response.data['errors'])
+        self.assertFalse(Reminder.objects.exists())
+
+    def test_valid_rules_are_accepted(self):
+        for rule in ['FREQ=HOURLY;BYHOUR=9,17', 'FREQ=MONTHLY;BYDAY=-1FR', 'FREQ=MONTHLY;BYDAY=MO,TU;BYSETPOS=1', 'FREQ=DAILY;COUNT=3']:
+            with self.subTest(rule=rule):
+                self.assertIsNotNone(recurrence.validate_rule(rule, utc(2026, 11, 2, 9)))
+
+    def stored(self, rule):
+        # As saved before validation caught it.
+        return Reminder.objects.create(
+            user=self.user, lead=self.lead, message='Call',
+            remind_at=django_timezone.now() - timedelta(minutes=1), recurrence=rule,
+        )
+
+    def sweep_twice(self):
+        with self.assertLogs('crm', 'ERROR'):
+            tasks.check_pending_reminders()
+        tasks.check_pending_reminders()
+
+    def test_bad_stored_rule_is_sent_once(self):
+        reminder = self.stored('FREQ=HOURLY;BYHOUR=25')
+        self.sweep_twice()
+        self.assertEqual(len(mail.outbox), 1)
+        reminder.refresh_from_db()
+        self.assertEqual(reminder.status, 'Complete')
+        self.assertEqual(Reminder.objects.count(), 1)
+
+    @override_settings(CRM_REMINDER_DIGEST_ENABLED=True)
+    def test_bad_stored_rule_is_sent_once_in_digest(self):
+        self.stored('FREQ=HOURLY;BYHOUR=25')
+        self.stored('FREQ=DAILY')
+        self.sweep_twice()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(Reminder.objects.filter(status='Complete').count(), 2)
+        # The valid series still moves on.
+        self.assertEqual(Reminder.objects.filter(status='Pending').count(), 1)
+
+    def test_failed_scheduling_keeps_the_reminder_complete(self):
+        reminder = self.stored('FREQ=DAILY')
+        with mock.patch('crm.recurrence.schedule_next', side_effect=DatabaseError('boom')):
+            self.sweep_twice()
+        self.assertEqual(len(mail.outbox), 1)
+        reminder.refresh_from_db()
+        self.assertEqual(reminder.status, 'Complete')
+
+    def test_bad_stored_rule_is_skipped_in_occurrences(self):
+        self.stored('FREQ=HOURLY;BYHOUR=25')
+        with self.assertLogs('crm.recurrence', 'ERROR'):
+            found = recurrence.occurrences(self.user, django_timezone.now() - timedelta(hours=1), django_timezone.now() + timedelta(days=1), 10)
+        self.assertEqual(len(found), 1)
@@ -0,0 +1,125 @@
+from datetime import timedelta
+from unittest import mock, skipUnless
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from crm import tasks
+from crm.dashboard import dashboard_stats
+from crm.models import Lead, Note, Reminder
+from crm.tokens import issue_token
+from .utils import RedisTestMixin, api_client, create_user, redis_available
+
+
+class EventStreamTests(TestCase):
+    url = '/api/events/'
+
+    def setUp(self):
+        self.user = create_user()
+        _, self.token = issue_token(self.user)
+
+    def test_refuses_wsgi_requests(self):
+        response = self.client.get(self.url, {'token': self.token})
+        self.assertEqual(response.status_code, 501)
+
+    async def test_requires_a_token(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(self.url, {'token': 'not-a-token'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_streams_over_asgi(self):
+        response = await self.async_client.get(self.url, headers={'Authorization': f"Token {self.token}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['X-Accel-Buffering'], 'no')
+
+
+@mock.patch('crm.streams.publish')
+@mock.patch('crm.tasks.publish_dashboard.delay', tasks.publish_dashboard)
+class DashboardEventTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.lead = Lead.objects.create(user=self.user, name='Acme', email='buyer@example.com')
+
+    def published_stats(self, publish):
+        self.assertTrue(publish.called)
+        for call in publish.call_args_list:
+            self.assertEqual(call.args[:2], (self.user.id, 'dashboard.changed'))
+        return publish.call_args.args[2]
+
+    def test_publishes_recomputed_counters(self, publish):
+        with self.captureOnCommitCallbacks(execute=True):
+            Reminder.objects.create(user=self.user, lead=self.lead, message='Past', remind_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(self.published_stats(publish)['pending_reminders'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Note.objects.bulk_create([Note(user=self.user, lead=self.lead, content=str(n)) for n in range(7)])
+            Reminder.objects.create(user=self.user, lead=self.lead, message='Next', remind_at=timezone.now() + timedelta(days=1))
+        self.assertEqual(self.published_stats(publish), {
+            'total_leads': 1, 'active_contacts': 0, 'pending_reminders': 1, 'recent_notes': 5,
+        })
+
+    @override_settings(CRM_REMINDER_DIGEST_ENABLED=True, EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_digest_sweep_publishes_once_per_user(self, publish):
+        Reminder.objects.bulk_create([
+            Reminder(user=self.user, lead=self.lead, message=str(n), remind_at=timezone.now() - timedelta(seconds=n + 1))
+            for n in range(3)
+        ])
+        Reminder.objects.create(user=self.user, lead=self.lead, message='Later', remind_at=timezone.now() + timedelta(days=2))
+        publish.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks.check_pending_reminders()
+        dashboard_calls = [call for call in publish.call_args_list if call.args[1] == 'dashboard.changed']
+        self.assertEqual(len(dashboard_calls), 1)
+        self.assertEqual(dashboard_calls[0].args[2], dashboard_stats(self.user.id))
+        self.assertEqual(dashboard_calls[0].args[2]['pending_reminders'], 1)
+
+    def test_sweep_refreshes_reminders_that_fell_due(self, publish):
+        # No email on the lead, so the sweep leaves it Pending, but the
+        # counter still dropped when its time passed.
+        Lead.objects.filter(pk=self.lead.pk).update(email='')
+        Reminder.objects.create(user=self.user, lead=self.lead, message='Now', remind_at=timezone.now() - timedelta(seconds=5))
+        publish.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True), self.assertLogs('crm.tasks', 'WARNING'):
+            tasks.check_pending_reminders()
+        self.assertEqual(self.published_stats(publish)['pending_reminders'], 0)
+
+
+@skipUnless(redis_available(), 'Redis is not running')
+@mock.patch('crm.streams.publish_dashboard')
+@mock.patch('crm.tasks.publish_dashboard.delay')
+class QueuedDashboardTests(RedisTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client = api_client(self.user)
+
+    def create_lead(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/leads/', {'name': name, 'email': f"{name}@example.com", 'phone': '555-0100'}, format='json')
+        return response.data['data']['id']
+
+    def test_writes_queue_one_recompute_until_it_runs(self, delay, publish_dashboard):
+        self.create_lead('acme')
+        self.create_lead('globex')
+        # Counted by the worker, not in the request.
+        publish_dashboard.assert_not_called()
+        delay.assert_called_once_with(self.user.id)
+
+        tasks.publish_dashboard(self.user.id)
+        publish_dashboard.assert_called_once_with(self.user.id)
+        self.create_lead('initech')
+        self.assertEqual(delay.call_count, 2)
+
+    def test_deleting_a_lead_refreshes_the_dashboard(self, delay, publish_dashboard):
+        pk = self.create_lead('acme')
+        tasks.publish_dashboard(self.user.id)
+        delay.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/api/leads/{pk}/")
+        self.assertEqual(response.status_code, 200)
+        delay.assert_called_once_with(self.user.id)
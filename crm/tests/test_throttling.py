@@ -0,0 +1,43 @@
+from unittest import skipUnless
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from .utils import RedisTestMixin, redis_available
+
+
+@skipUnless(redis_available(), 'Redis is not running')
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoginIPThrottleTests(RedisTestMixin, TestCase):
+    url = '/api/login/'
+
+    def login(self, client, attempt, forwarded_for):
+        return client.post(
+            self.url,
+            {'username': f"user{attempt}", 'password': 'wrong'},
+            format='json',
+            HTTP_X_FORWARDED_FOR=forwarded_for,
+            REMOTE_ADDR='127.0.0.1',
+        )
+
+    def test_rotating_forwarded_for_does_not_reset_the_bucket(self):
+        # nginx appends the address it saw, so only the last entry is trusted.
+        client = APIClient()
+        statuses = [
+            self.login(client, attempt, f"10.0.0.{attempt}, 203.0.113.7").status_code
+            for attempt in range(25)
+        ]
+        self.assertNotIn(429, statuses[:20])
+        self.assertEqual(statuses[20:], [429] * 5)
+
+    def test_clients_behind_the_proxy_get_separate_buckets(self):
+        client = APIClient()
+        for attempt in range(20):
+            self.login(client, attempt, '203.0.113.7')
+        self.assertEqual(self.login(client, 20, '203.0.113.7').status_code, 429)
+        self.assertNotEqual(self.login(client, 21, '198.51.100.4').status_code, 429)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 0})
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        client = APIClient()
+        statuses = [self.login(client, attempt, f"10.0.0.{attempt}").status_code for attempt in range(21)]
+        self.assertEqual(statuses[-1], 429)
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from crm import webhooks
+from crm.models import Contact, Lead, Note, OutboxEvent, Reminder, WebhookEndpoint
+from crm.serializers import ContactSerializer, LeadSerializer, NoteSerializer, ReminderSerializer
+from .receiver import WebhookReceiver
+import json
+import uuid
+
+
+def create_events(count, start=0):
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(event='lead.updated', lead_id=n % 7, object_id=n, payload={'n': n})
+        for n in range(start, start + count)
+    ])
+
+
+@override_settings(WEBHOOK_BATCH_SIZE=100, WEBHOOK_MAX_BATCHES_PER_RUN=20)
+class WebhookDeliveryTests(TestCase):
+
+    def setUp(self):
+        self.receiver = WebhookReceiver()
+        self.receiver.__enter__()
+        self.addCleanup(self.receiver.__exit__, None, None, None)
+        self.endpoint = WebhookEndpoint.objects.create(url=self.receiver.url, secret='top-secret')
+
+    def test_delivers_in_batches_and_prunes(self):
+        create_events(250)
+        self.assertEqual(webhooks.deliver_pending(), 250)
+
+        self.assertEqual([len(body['events']) for _, _, body in self.receiver.requests], [100, 100, 50])
+        self.endpoint.refresh_from_db()
+        self.assertEqual(self.endpoint.last_seq, self.receiver.events[-1]['seq'])
+        self.assertIsNone(self.endpoint.lease_token)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_signs_each_batch(self):
+        create_events(3)
+        webhooks.deliver_pending()
+
+        headers, raw, _ = self.receiver.requests[0]
+        timestamp = headers['X-MiniCRM-Timestamp']
+        self.assertEqual(headers['X-MiniCRM-Signature'], f"sha256={webhooks.sign('top-secret', timestamp, raw)}")
+        self.assertNotEqual(headers['X-MiniCRM-Signature'], f"sha256={webhooks.sign('other', timestamp, raw)}")
+
+    def test_delivers_in_order_and_keeps_late_commits(self):
+        first, in_flight, last = create_events(3)
+        # Stand-in for a transaction that allocated its id but has not
+        # committed when the sweep runs.
+        in_flight.delete()
+        webhooks.deliver_pending()
+        OutboxEvent.objects.create(
+            id=in_flight.id, event=in_flight.event, lead_id=in_flight.lead_id,
+            object_id=in_flight.object_id, payload=in_flight.payload,
+        )
+        create_events(2, start=3)
+        webhooks.deliver_pending()
+
+        events = self.receiver.events
+        self.assertEqual([event['object_id'] for event in events], [0, 2, 1, 3, 4])
+        seqs = [event['seq'] for event in events]
+        self.assertEqual(seqs, sorted(seqs))
+
+    def test_backs_off_after_a_failed_batch(self):
+        self.receiver.statuses = [500]
+        create_events(150)
+
+        with self.assertLogs('crm.webhooks', 'WARNING'):
+            self.assertEqual(webhooks.deliver_pending(), 0)
+        self.endpoint.refresh_from_db()
+        self.assertEqual(self.endpoint.failures, 1)
+        self.assertEqual(self.endpoint.last_seq, 0)
+        self.assertGreater(self.endpoint.next_attempt_at, timezone.now() + timedelta(seconds=9))
+        self.assertEqual(OutboxEvent.objects.count(), 150)
+
+        # Still backing off: nothing is sent.
+        self.assertEqual(webhooks.deliver_pending(), 0)
+        self.assertEqual(self.receiver.requests, [])
+
+        WebhookEndpoint.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(webhooks.deliver_pending(), 150)
+        self.assertEqual([event['object_id'] for event in self.receiver.events], list(range(150)))
+        self.endpoint.refresh_from_db()
+        self.assertEqual(self.endpoint.failures, 0)
+        self.assertIsNone(self.endpoint.next_attempt_at)
+
+    def test_backoff_grows_with_failures(self):
+        delays = [webhooks.backoff(failures).total_seconds() for failures in (1, 2, 3, 20)]
+        self.assertTrue(10 <= delays[0] <= 11)
+        self.assertTrue(20 <= delays[1] <= 22)
+        self.assertTrue(40 <= delays[2] <= 44)
+        self.assertTrue(3600 <= delays[3] <= 3960)
+
+    def test_skips_endpoints_leased_by_another_worker(self):
+        create_events(5)
+        WebhookEndpoint.objects.update(lease_token=uuid.uuid4(), leased_until=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(webhooks.deliver_pending(), 0)
+
+        # An expired lease (the other worker died) is taken over.
+        WebhookEndpoint.objects.update(leased_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(webhooks.deliver_pending(), 5)
+
+
+class OutboxPayloadTests(TestCase):
+
+    def test_payloads_match_the_api_representation(self):
+        user = User.objects.create_user('alice')
+        lead = Lead.objects.create(user=user, name='Acme', email='acme@example.com', company='Acme Inc')
+        rows = [
+            (lead, LeadSerializer),
+            (Contact.objects.create(user=user, lead=lead, name='Jo', email='jo@example.com'), ContactSerializer),
+            (Note.objects.create(user=user, lead=lead, content='Called'), NoteSerializer),
+            (Reminder.objects.create(
+                user=user, lead=lead, message='Call back', remind_at=timezone.now(),
+                recurrence='FREQ=DAILY', recurrence_start=timezone.now(),
+            ), ReminderSerializer),
+        ]
+        for instance, serializer_class in rows:
+            with self.subTest(model=type(instance).__name__):
+                event = OutboxEvent.objects.get(object_id=instance.pk, event=f"{type(instance).__name__.lower()}.created")
+                self.assertEqual(event.payload, json.loads(json.dumps(serializer_class(instance).data)))
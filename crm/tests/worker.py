@@ -0,0 +1,49 @@
+"""
+A real Celery worker for one queue profile, run as a subprocess by the queue
+tests. The bulk purge and webhook delivery are replaced by jobs that block
+until released through Redis, standing in for long-running work.
+
+    python -m crm.tests.worker <name> <queue,queue>
+
+The test database, broker and Redis come from the usual environment
+variables (DB_NAME, CELERY_BROKER_URL, REDIS_URL).
+"""
+import os
+import redis
+import sys
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'core.settings_worker'
+
+# Keys the heavy jobs report on and wait for.
+STARTED_KEY = 'test:heavy:started'
+RELEASE_KEY = 'test:heavy:release'
+RELEASE_TIMEOUT = 30
+
+
+def heavy(*args, **kwargs):
+    # A client of its own: crm.redis_client's socket timeout is far shorter
+    # than the wait.
+    client = redis.Redis.from_url(os.environ['REDIS_URL'])
+    client.rpush(STARTED_KEY, 1)
+    client.blpop(RELEASE_KEY, RELEASE_TIMEOUT)
+    client.rpush(RELEASE_KEY, 1)  # leave it set for the other heavy job
+    return 0
+
+
+def main(name, queues):
+    from core.celery import app
+    import django
+    django.setup()
+    from django.conf import settings
+    from crm import purge, webhooks
+
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.dummy.EmailBackend'
+    purge.purge_leads = webhooks.deliver_pending = heavy
+    app.worker_main([
+        'worker', '-Q', queues, '-n', f"{name}@%h", '-P', 'solo', '-l', 'WARNING',
+        '--without-heartbeat', '--without-mingle', '--without-gossip',
+    ])
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,116 @@
+from rest_framework.throttling import SimpleRateThrottle
+from .redis_client import get_redis
+import logging
+import math
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Refill the bucket for the time elapsed since the last call, then try to take
+# one token. Runs atomically inside Redis and uses the Redis clock so every web
+# worker sees the same bucket. Returns {allowed, seconds until next token}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill_rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / refill_rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / refill_rate * 1000))
+return {allowed, tostring(wait)}
+"""
+
+_script = None
+
+
+def _token_bucket():
+    global _script
+    if _script is None:
+        _script = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+    return _script
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token-bucket throttle backed by Redis. The rate in DEFAULT_THROTTLE_RATES
+    is read as bucket capacity / refill period, so '10/min' allows a burst of
+    10 and then one request every 6 seconds. Fails open if Redis is down.
+    """
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        try:
+            allowed, wait = _token_bucket()(
+                keys=[self.key],
+                args=[self.num_requests, self.num_requests / self.duration],
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiter unavailable, allowing request: {str(e)}")
+            return True
+
+        self.retry_after = float(wait)
+        return bool(allowed)
+
+    def wait(self):
+        return math.ceil(self.retry_after)
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginUserThrottle(TokenBucketThrottle):
+    """
+    Limits attempts against a single username, whichever IP they come from.
+    """
+    scope = 'login_user'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': username.lower()}
+
+
+class RegisterIPThrottle(TokenBucketThrottle):
+    scope = 'register_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class CRMWriteThrottle(TokenBucketThrottle):
+    """
+    Per-user, per-endpoint limit on CRM writes. Reads are not throttled.
+    """
+    scope = 'crm_write'
+
+    def get_cache_key(self, request, view):
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or not request.user.is_authenticated:
+            return None
+        ident = f"{request.user.pk}:{view.__class__.__name__}"
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from knox.models import AuthToken
+from knox.settings import knox_settings
+
+
+def issue_token(user):
+    """
+    Create a knox token for `user`, first dropping their expired tokens and,
+    if REST_KNOX['TOKEN_LIMIT_PER_USER'] is set, their oldest ones so the new
+    token stays within the limit. Returns (instance, token) like
+    AuthToken.objects.create.
+    """
+    limit = knox_settings.TOKEN_LIMIT_PER_USER
+    with transaction.atomic():
+        # Serialize concurrent logins of the same user so they can't both
+        # squeeze in under the limit.
+        User.objects.select_for_update().filter(pk=user.pk).first()
+
+        tokens = AuthToken.objects.filter(user=user)
+        tokens.filter(expiry__lt=timezone.now()).delete()
+        if limit:
+            oldest = list(tokens.order_by('-created').values_list('digest', flat=True)[limit - 1:])
+            if oldest:
+                AuthToken.objects.filter(digest__in=oldest).delete()
+        return AuthToken.objects.create(user)
@@ -1,8 +1,11 @@
 from django.urls import path
 from .views import DashboardAPIView, LeadAPIView, ContactAPIView, NoteAPIView, RegisterView, ReminderAPIView
+from .views import AccountAPIView, LeadBulkDeleteAPIView, LeadBundleAPIView, PurgeStatusAPIView, ReminderOccurrencesAPIView
+from .views import ProfileDetailAPIView, ProfileListAPIView
 
 from knox import views as knox_views
 from .views import LoginView
+from .streams import event_stream
 from django.views.decorators.csrf import csrf_exempt
 
 urlpatterns = [
@@ -11,17 +14,27 @@ urlpatterns = [
     path('logout/', knox_views.LogoutView.as_view(), name='knox_logout'),
     path('logoutall/', knox_views.LogoutAllView.as_view(), name='knox_logoutall'),
     path('register/', csrf_exempt(RegisterView.as_view()), name='knox_register'),
+    path('account/', AccountAPIView.as_view(), name='account'),
 
     # Dashboard
     path('dashboard/', DashboardAPIView.as_view(), name='dashboard'),
+    path('events/', event_stream, name='events'),
 
     # API
     path('leads/', LeadAPIView.as_view()),
     path('leads/<int:pk>/', LeadAPIView.as_view()),
+    path('leads/<int:pk>/bundle/', LeadBundleAPIView.as_view()),
+    path('leads/bulk-delete/', LeadBulkDeleteAPIView.as_view()),
+    path('purges/<str:task_id>/', PurgeStatusAPIView.as_view()),
     path('contacts/', ContactAPIView.as_view()),
     path('contacts/<int:pk>/', ContactAPIView.as_view()),
     path('notes/', NoteAPIView.as_view()),
     path('notes/<int:pk>/', NoteAPIView.as_view()),
     path('reminders/', ReminderAPIView.as_view()),
     path('reminders/<int:pk>/', ReminderAPIView.as_view()),
+    path('reminders/occurrences/', ReminderOccurrencesAPIView.as_view()),
+
+    # Profiling (staff only)
+    path('profiles/', ProfileListAPIView.as_view()),
+    path('profiles/<str:profile_id>/', ProfileDetailAPIView.as_view()),
 ]
\ No newline at end of file
@@ -1,19 +1,98 @@
+from datetime import timedelta
+from operator import attrgetter
 from django.shortcuts import get_object_or_404
-from django.utils.timezone import now
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions
-from .models import Lead, Contact, Note, Reminder
+from .models import Lead, Contact, Note, Reminder, ArchivedNote, ArchivedReminder
 from .serializers import LeadSerializer, ContactSerializer, NoteSerializer, RegisterSerializer, ReminderSerializer
+from .serializers import LeadBundleSerializer
 from knox.models import AuthToken
 from django.contrib.auth import login
 from rest_framework.authtoken.serializers import AuthTokenSerializer
 from knox.views import LoginView as KnoxLoginView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.db import transaction
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.conf import settings
+from celery.result import AsyncResult
+import heapq
+import redis
+from . import purge, recurrence, streams
+from .dashboard import RECENT_NOTES, dashboard_stats
+from .filters import LeadFilter, ContactFilter, NoteFilter, ReminderFilter
+from .idempotency import idempotent
+from .profiling import recent_profiles
+from .redis_client import get_redis
+from .tokens import issue_token
+from .throttling import CRMWriteThrottle, LoginIPThrottle, LoginUserThrottle, RegisterIPThrottle
+from .tasks import purge_leads, purge_account
+
+def include_archived(request):
+    return request.query_params.get('include_archived') in ('1', 'true')
+
+def invalid_filters(filters):
+    return Response({
+        'message': 'Invalid filters',
+        'errors': filters.errors
+    }, status=400)
+
+def with_archived(rows, archived, ordering=None):
+    """
+    Hot rows followed by their archived counterparts. With an `ordering`,
+    both querysets come back sorted and are merged into one sorted list.
+    """
+    if not ordering:
+        return [*rows, *archived]
+    return list(heapq.merge(
+        rows, archived, key=attrgetter(ordering.lstrip('-')), reverse=ordering.startswith('-')
+    ))
+
+def _child_count(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(lead=OuterRef('pk'))
+            .order_by()
+            .values('lead')
+            .annotate(count=Count('pk'))
+            .values('count')
+        ),
+        0,
+    )
+
+def lead_bundle_queryset(user, expand=LeadBundleSerializer.EXPANDABLE):
+    """
+    Leads annotated with child counts, with the latest N children of each
+    expanded type prefetched: one query for the leads plus one per type.
+    """
+    limit = settings.CRM_LEAD_BUNDLE_CHILD_LIMIT
+    prefetches = {
+        'contacts': Prefetch(
+            'Lead_Contact', queryset=Contact.objects.order_by('-id')[:limit], to_attr='latest_contacts'
+        ),
+        'notes': Prefetch(
+            'Lead_Note', queryset=Note.objects.order_by('-created_at')[:limit], to_attr='latest_notes'
+        ),
+        'reminders': Prefetch(
+            'Reminder_related_lead', queryset=Reminder.objects.order_by('-remind_at')[:limit], to_attr='latest_reminders'
+        ),
+    }
+    return (
+        Lead.objects.filter(user=user)
+        .annotate(
+            contact_count=_child_count(Contact),
+            note_count=_child_count(Note),
+            reminder_count=_child_count(Reminder),
+        )
+        .prefetch_related(*[prefetches[name] for name in expand])
+    )
 
 class LoginView(KnoxLoginView):
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (LoginIPThrottle, LoginUserThrottle)
 
     def post(self, request, format=None):
         try:
@@ -24,7 +103,7 @@ class LoginView(KnoxLoginView):
                 login(request, user)
                 
                 # Get the token and expiry from Knox
-                token_instance, token = AuthToken.objects.create(user)
+                token_instance, token = issue_token(user)
                 
                 return Response({
                     'message': 'Successfully logged in',
@@ -50,6 +129,7 @@ class LoginView(KnoxLoginView):
 
 class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [RegisterIPThrottle]
 
     def post(self, request, format=None):
         try:
@@ -57,7 +137,7 @@ class RegisterView(APIView):
             serializer = RegisterSerializer(data=request.data)
             if serializer.is_valid():
                 user = serializer.save()
-                _, token = AuthToken.objects.create(user)
+                _, token = issue_token(user)
 
                 return Response({
                     'message': 'User registered successfully',
@@ -88,18 +168,11 @@ class DashboardAPIView(APIView):
         try:
             user = request.user
 
-            total_leads = Lead.objects.filter(user=user).count()
-            active_contacts = Contact.objects.filter(user=user).count()
-            pending_reminders = Reminder.objects.filter(
-                user=user, remind_at__gte=now()
-            ).count()
-
             recent_notes = (
                 Note.objects.filter(user=user)
                 .select_related('lead')
-                .order_by('-created_at')[:5]
+                .order_by('-created_at')[:RECENT_NOTES]
             )
-            recent_notes_count = recent_notes.count()
 
             recent_reminders = (
                 Reminder.objects.filter(user=user)
@@ -128,12 +201,7 @@ class DashboardAPIView(APIView):
             )
 
             data = {
-                "stats": {
-                    "total_leads": total_leads,
-                    "active_contacts": active_contacts,
-                    "pending_reminders": pending_reminders,
-                    "recent_notes": recent_notes_count,
-                },
+                "stats": dashboard_stats(user.id),
                 "recent_activity": recent_activities,
             }
 
@@ -150,20 +218,35 @@ class DashboardAPIView(APIView):
 
 class LeadAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [CRMWriteThrottle]
 
     def get(self, request, pk=None):
-        print("User: ", request.user)
+        filters = LeadFilter(request.query_params)
         if pk:
             lead = get_object_or_404(Lead, pk=pk, user=request.user) 
             serializer = LeadSerializer(lead)
+        elif not filters.is_valid():
+            return invalid_filters(filters)
+        elif 'expand' in request.query_params:
+            expand = [name for name in request.query_params['expand'].split(',') if name]
+            invalid = set(expand) - set(LeadBundleSerializer.EXPANDABLE)
+            if invalid:
+                return Response({
+                    'message': 'Invalid expand value',
+                    'errors': {'expand': [f"Unknown relation(s): {', '.join(sorted(invalid))}"]}
+                }, status=400)
+            leads = filters.filter_queryset(lead_bundle_queryset(request.user, expand))
+            serializer = LeadBundleSerializer(leads, many=True, context={'expand': expand})
         else:
-            leads = Lead.objects.filter(user=request.user)
+            leads = filters.filter_queryset(Lead.objects.filter(user=request.user))
             serializer = LeadSerializer(leads, many=True)
         return Response({
             'message': 'Lead(s) retrieved successfully',
             'data': serializer.data
         })
 
+    @idempotent
+    @transaction.atomic
     def post(self, request):
         serializer = LeadSerializer(data=request.data)
         if serializer.is_valid():
@@ -177,6 +260,7 @@ class LeadAPIView(APIView):
             'errors': serializer.errors
         })
 
+    @transaction.atomic
     def put(self, request, pk):
         lead = get_object_or_404(Lead, pk=pk, user=request.user)
         serializer = LeadSerializer(lead, data=request.data)
@@ -193,26 +277,122 @@ class LeadAPIView(APIView):
 
     def delete(self, request, pk):
         lead = get_object_or_404(Lead, pk=pk, user=request.user)
-        lead.delete()
+        purge.purge_leads([lead.pk])
+        streams.refresh_dashboard(request.user.id)
         return Response({
             'message': 'Lead deleted successfully'
         })
+
+class LeadBundleAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        lead = get_object_or_404(lead_bundle_queryset(request.user), pk=pk)
+        serializer = LeadBundleSerializer(lead)
+        return Response({
+            'message': 'Lead retrieved successfully',
+            'data': serializer.data
+        })
+
+# Redis key holding the id of the user who queued a purge task. A task's
+# result only names its owner once it has started, so PENDING, failed and
+# expired tasks are checked against this instead.
+TASK_OWNER_PREFIX = 'crm:task-owner:'
+
+class LeadBulkDeleteAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [CRMWriteThrottle]
+
+    @idempotent
+    def post(self, request):
+        ids = request.data.get('ids')
+        limit = settings.CRM_BULK_DELETE_MAX_IDS
+        if not isinstance(ids, list) or not ids:
+            error = 'A non-empty list of lead ids is required.'
+        elif len(ids) > limit:
+            error = f"At most {limit} lead ids can be deleted per request."
+        elif not all(type(lead_id) is int for lead_id in ids):
+            error = 'Lead ids must be integers.'
+        else:
+            error = None
+        if error:
+            return Response({
+                'message': 'Lead deletion failed',
+                'errors': {'ids': [error]}
+            }, status=400)
+
+        lead_ids = list(
+            Lead.objects.filter(user=request.user, pk__in=ids).values_list('id', flat=True)
+        )
+        task = purge_leads.delay(request.user.id, lead_ids)
+        try:
+            get_redis().set(f"{TASK_OWNER_PREFIX}{task.id}", request.user.id, ex=settings.CRM_PURGE_STATUS_TTL)
+        except redis.RedisError:
+            # The deletion still runs; only its status can't be polled.
+            pass
+        return Response({
+            'message': 'Lead deletion queued',
+            'data': {'task_id': task.id, 'total': len(lead_ids)}
+        }, status=202)
+
+class PurgeStatusAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, task_id):
+        try:
+            owner = get_redis().get(f"{TASK_OWNER_PREFIX}{task_id}")
+        except redis.RedisError:
+            return Response({'message': 'Deletion status is temporarily unavailable.'}, status=503)
+        if owner is None or int(owner) != request.user.id:
+            return Response({'message': 'Not found.'}, status=404)
+
+        result = AsyncResult(task_id)
+        info = result.info if isinstance(result.info, dict) else {}
+        return Response({
+            'message': 'Deletion status retrieved successfully',
+            'data': {
+                'state': result.state,
+                'done': info.get('done', 0),
+                'total': info.get('total'),
+            }
+        })
+
+class AccountAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def delete(self, request):
+        user = request.user
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        AuthToken.objects.filter(user=user).delete()
+
+        task = purge_account.delay(user.id)
+        return Response({
+            'message': 'Account deletion queued',
+            'data': {'task_id': task.id}
+        }, status=202)
     
 class ContactAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [CRMWriteThrottle]
 
     def get(self, request, pk=None):
         if pk:
             contact = get_object_or_404(Contact, pk=pk, user=request.user)
             serializer = ContactSerializer(contact)
         else:
-            contacts = Contact.objects.filter(user=request.user)
+            filters = ContactFilter(request.query_params)
+            if not filters.is_valid():
+                return invalid_filters(filters)
+            contacts = filters.filter_queryset(Contact.objects.filter(user=request.user))
             serializer = ContactSerializer(contacts, many=True)
         return Response({
             'message': 'Contact(s) retrieved successfully',
             'data': serializer.data
         })
 
+    @idempotent
+    @transaction.atomic
     def post(self, request):
         serializer = ContactSerializer(data=request.data, context={'user': request.user})
         if serializer.is_valid():
@@ -226,6 +406,7 @@ class ContactAPIView(APIView):
             'errors': serializer.errors
         })
 
+    @transaction.atomic
     def put(self, request, pk):
         contact = get_object_or_404(Contact, pk=pk, user=request.user)
         serializer = ContactSerializer(contact, data=request.data, context={'user': request.user})
@@ -249,19 +430,28 @@ class ContactAPIView(APIView):
 
 class NoteAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [CRMWriteThrottle]
 
     def get(self, request, pk=None):
         if pk:
             note = get_object_or_404(Note, pk=pk, user=request.user)
             serializer = NoteSerializer(note)
         else:
-            notes = Note.objects.filter(user=request.user).select_related('lead')
+            filters = NoteFilter(request.query_params)
+            if not filters.is_valid():
+                return invalid_filters(filters)
+            notes = filters.filter_queryset(Note.objects.filter(user=request.user).select_related('lead'))
+            if include_archived(request):
+                archived = filters.filter_queryset(ArchivedNote.objects.filter(user=request.user).select_related('lead'))
+                notes = with_archived(notes, archived, filters.ordering)
             serializer = NoteSerializer(notes, many=True)
         return Response({
             'message': 'Note(s) retrieved successfully',
             'data': serializer.data
         })
 
+    @idempotent
+    @transaction.atomic
     def post(self, request):
         serializer = NoteSerializer(data=request.data)
         if serializer.is_valid():
@@ -275,6 +465,7 @@ class NoteAPIView(APIView):
             'errors': serializer.errors
         })
 
+    @transaction.atomic
     def put(self, request, pk):
         note = get_object_or_404(Note, pk=pk, user=request.user)
         serializer = NoteSerializer(note, data=request.data)
@@ -298,19 +489,28 @@ class NoteAPIView(APIView):
 
 class ReminderAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [CRMWriteThrottle]
 
     def get(self, request, pk=None):
         if pk:
             reminder = get_object_or_404(Reminder, pk=pk, user=request.user) 
             serializer = ReminderSerializer(reminder)
         else:
-            reminders = Reminder.objects.filter(user=request.user).select_related('lead') 
+            filters = ReminderFilter(request.query_params)
+            if not filters.is_valid():
+                return invalid_filters(filters)
+            reminders = filters.filter_queryset(Reminder.objects.filter(user=request.user).select_related('lead'))
+            if include_archived(request):
+                archived = filters.filter_queryset(ArchivedReminder.objects.filter(user=request.user).select_related('lead'))
+                reminders = with_archived(reminders, archived, filters.ordering)
             serializer = ReminderSerializer(reminders, many=True)
         return Response({
             'message': 'Reminder(s) retrieved successfully',
             'data': serializer.data
         })
 
+    @idempotent
+    @transaction.atomic
     def post(self, request):
         if 'remind_at' not in request.data:
             request.data['remind_at'] = timezone.now()
@@ -328,6 +528,7 @@ class ReminderAPIView(APIView):
             'errors': serializer.errors
         })
 
+    @transaction.atomic
     def put(self, request, pk):
         reminder = get_object_or_404(Reminder, pk=pk, user=request.user)
         serializer = ReminderSerializer(reminder, data=request.data)
@@ -347,4 +548,82 @@ class ReminderAPIView(APIView):
         reminder.delete()
         return Response({
             'message': 'Reminder deleted successfully'
-        })
\ No newline at end of file
+        })
+
+class ReminderOccurrencesAPIView(APIView):
+    """
+    Reminders between `start` and `end` (ISO 8601, default: the next 30
+    days), with the future occurrences of recurring reminders expanded on the
+    fly. Expanded occurrences have `materialized: false` and no row yet.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def _parse(self, request, name, default):
+        value = request.query_params.get(name)
+        if value is None:
+            return default
+        parsed = parse_datetime(value)
+        if parsed is None:
+            return None
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def get(self, request):
+        start = self._parse(request, 'start', timezone.now())
+        end = self._parse(request, 'end', (start or timezone.now()) + timedelta(days=30))
+        errors = {}
+        if start is None:
+            errors['start'] = ['Enter a valid ISO 8601 date/time.']
+        if end is None:
+            errors['end'] = ['Enter a valid ISO 8601 date/time.']
+        elif start is not None and not start <= end <= start + timedelta(days=settings.CRM_REMINDER_OCCURRENCE_MAX_DAYS):
+            errors['end'] = [f"Must be after start and at most {settings.CRM_REMINDER_OCCURRENCE_MAX_DAYS} days later."]
+        if errors:
+            return Response({
+                'message': 'Invalid date range',
+                'errors': errors
+            }, status=400)
+
+        data = [
+            {
+                'id': reminder.id,
+                'message': reminder.message,
+                'remind_at': remind_at,
+                'status': reminder.status if materialized else 'Pending',
+                'recurrence': reminder.recurrence,
+                'materialized': materialized,
+                'lead': {'id': reminder.lead.id, 'name': reminder.lead.name},
+            }
+            for remind_at, reminder, materialized in recurrence.occurrences(
+                request.user, start, end, settings.CRM_REMINDER_OCCURRENCE_LIMIT
+            )
+        ]
+        return Response({
+            'message': 'Reminder occurrence(s) retrieved successfully',
+            'data': data
+        })
+
+class ProfileListAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        profiles = [
+            {key: value for key, value in profile.items() if key not in ('queries', 'stats')}
+            for profile in recent_profiles()
+        ]
+        return Response({
+            'message': 'Profile(s) retrieved successfully',
+            'data': profiles
+        })
+
+class ProfileDetailAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        for profile in recent_profiles():
+            if profile['id'] == profile_id:
+                response = Response(profile)
+                response['Content-Disposition'] = f'attachment; filename="profile-{profile_id}.json"'
+                return response
+        return Response({'message': 'Not found.'}, status=404)
@@ -0,0 +1,187 @@
+from datetime import timedelta
+from hashlib import sha256
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Max, Min, Q
+from django.db.models.functions import Now
+from .models import OutboxEvent, WebhookEndpoint
+from .purge import delete_in_batches
+import hmac
+import json
+import logging
+import random
+import time
+import urllib.request
+import uuid
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE = 'crm_outboxevent_seq'
+# pg_advisory_xact_lock key serializing sequence_events across workers.
+SEQUENCE_LOCK_ID = 0x6372_6d5f_7365_71
+
+
+def sign(secret, timestamp, body):
+    message = f"{timestamp}.".encode() + body
+    return hmac.new(secret.encode(), message, sha256).hexdigest()
+
+
+def post_events(endpoint, events):
+    """
+    Deliver a batch of events to one endpoint as a single signed POST.
+    Raises OSError (including HTTPError for non-2xx responses) on failure.
+    """
+    body = json.dumps({
+        'events': [
+            {
+                'id': event.id,
+                'seq': event.seq,
+                'event': event.event,
+                'lead_id': event.lead_id,
+                'object_id': event.object_id,
+                'created_at': event.created_at,
+                'data': event.payload,
+            }
+            for event in events
+        ]
+    }, cls=DjangoJSONEncoder).encode()
+    timestamp = str(int(time.time()))
+
+    request = urllib.request.Request(endpoint.url, data=body, method='POST', headers={
+        'Content-Type': 'application/json',
+        'X-MiniCRM-Timestamp': timestamp,
+        'X-MiniCRM-Signature': f"sha256={sign(endpoint.secret, timestamp, body)}",
+    })
+    with urllib.request.urlopen(request, timeout=settings.WEBHOOK_TIMEOUT) as response:
+        response.read()
+
+
+def backoff(failures):
+    delay = min(settings.WEBHOOK_RETRY_MAX_DELAY, settings.WEBHOOK_RETRY_BASE_DELAY * 2 ** (failures - 1))
+    return timedelta(seconds=delay * random.uniform(1, 1.1))
+
+
+def sequence_events():
+    """
+    Give committed events without a delivery position the next values of
+    SEQUENCE, in id order. Ids are allocated before commit, so an event can
+    commit after a higher-id one was already delivered; sequencing only what
+    is visible, one run at a time, means a seq is never handed out below one a
+    worker could already have read. Returns the number of events sequenced.
+    """
+    table = connection.ops.quote_name(OutboxEvent._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [SEQUENCE_LOCK_ID])
+        ids = list(
+            OutboxEvent.objects.filter(seq__isnull=True)
+            .order_by('id')
+            .values_list('id', flat=True)[:settings.WEBHOOK_SEQUENCE_BATCH_SIZE]
+        )
+        if not ids:
+            return 0
+
+        cursor.execute("SELECT nextval(%s)", [SEQUENCE])
+        start = cursor.fetchone()[0]
+        cursor.execute("SELECT setval(%s, %s)", [SEQUENCE, start + len(ids) - 1])
+        cursor.execute(
+            f"UPDATE {table} SET seq = %s + batch.n - 1 "
+            f"FROM unnest(%s::bigint[]) WITH ORDINALITY AS batch(id, n) "
+            f"WHERE {table}.id = batch.id",
+            [start, ids],
+        )
+    return len(ids)
+
+
+def _claim(endpoint_id, token):
+    """
+    Take the delivery lease on an endpoint unless another worker holds an
+    unexpired one. Returns the endpoint, or None.
+    """
+    with transaction.atomic():
+        endpoint = (
+            WebhookEndpoint.objects.select_for_update(skip_locked=True)
+            .filter(pk=endpoint_id, is_active=True)
+            .filter(Q(lease_token__isnull=True) | Q(leased_until__lt=Now()))
+            .first()
+        )
+        if endpoint is not None:
+            WebhookEndpoint.objects.filter(pk=endpoint_id).update(
+                lease_token=token,
+                leased_until=Now() + timedelta(seconds=settings.WEBHOOK_LEASE_TIMEOUT),
+            )
+        return endpoint
+
+
+def _settle(endpoint_id, token, **fields):
+    """
+    Record the outcome of a batch and release the lease, unless it expired and
+    was taken over in the meantime. Returns whether the lease was still held.
+    """
+    return bool(
+        WebhookEndpoint.objects.filter(pk=endpoint_id, lease_token=token)
+        .update(lease_token=None, leased_until=None, **fields)
+    )
+
+
+def drain_endpoint(endpoint_id):
+    """
+    Push pending events to one endpoint, oldest first. Each batch is claimed
+    and read in a short transaction, POSTed with no transaction open, and
+    then settled, so a slow endpoint never holds locks. A failed batch stops
+    the drain and schedules a retry, so events for a lead are never delivered
+    out of order. Returns the number of events delivered.
+    """
+    delivered = 0
+    token = uuid.uuid4()
+
+    for _ in range(settings.WEBHOOK_MAX_BATCHES_PER_RUN):
+        endpoint = _claim(endpoint_id, token)
+        if endpoint is None:
+            break
+
+        events = list(
+            OutboxEvent.objects.filter(seq__gt=endpoint.last_seq)
+            .order_by('seq')[:settings.WEBHOOK_BATCH_SIZE]
+        )
+        if not events:
+            _settle(endpoint_id, token)
+            break
+
+        try:
+            post_events(endpoint, events)
+        except (OSError, ValueError) as e:
+            failures = endpoint.failures + 1
+            _settle(endpoint_id, token, failures=failures, next_attempt_at=Now() + backoff(failures))
+            logger.warning(f"Webhook delivery to {endpoint.url} failed (attempt {failures}): {str(e)}")
+            break
+
+        if not _settle(endpoint_id, token, last_seq=events[-1].seq, failures=0, next_attempt_at=None):
+            logger.warning(f"Lost the delivery lease on {endpoint.url}, stopping")
+            break
+        delivered += len(events)
+
+    return delivered
+
+
+def prune_delivered():
+    """
+    Remove events every active endpoint has already accepted.
+    """
+    active = WebhookEndpoint.objects.filter(is_active=True)
+    if active.exists():
+        cursor = active.aggregate(cursor=Min('last_seq'))['cursor']
+    else:
+        cursor = OutboxEvent.objects.aggregate(cursor=Max('seq'))['cursor'] or 0
+    return delete_in_batches(OutboxEvent, f"{connection.ops.quote_name('seq')} <= %s", [cursor])
+
+
+def deliver_pending():
+    sequence_events()
+    due = WebhookEndpoint.objects.filter(is_active=True).filter(
+        Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=Now())
+    ).values_list('id', flat=True)
+
+    delivered = sum(drain_endpoint(endpoint_id) for endpoint_id in due)
+    prune_delivered()
+    return delivered